@@ -0,0 +1,468 @@
+"""Benchmarks of cTurtle's drawing code.
+
+Run `python benchmark.py` to run all benchmarks, or name the ones to run,
+e.g. `python benchmark.py turtles`. The benchmarks draw with the recording
+backend, so they need no X server and measure cTurtle rather than Tk.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('TURTLEBACKEND', 'recording')
+
+import cTurtle
+from cTurtle import cTurtle as _cTurtle
+
+
+def _timed(function, repeat=3):
+    """Return the least time of repeat calls of function."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _count_calls(screen, names):
+    """Count the calls of the screen methods names, return the dict
+    of counts."""
+    counts = dict.fromkeys(names, 0)
+
+    def counting(name, method):
+        def wrap(*args, **kwargs):
+            counts[name] += 1
+            return method(*args, **kwargs)
+        return wrap
+    for name in names:
+        setattr(screen, name, counting(name, getattr(screen, name)))
+    return counts
+
+
+def bench_turtles(steps=200):
+    """Move the first or the last of n turtles, with and without dirty
+    tracking. The line of the moving turtle grows above the others,
+    whose shapes are raised at once by their common tag."""
+    print('turtles: time (us) and screen calls per step of one turtle '
+          'among n')
+    print('{0:>6} {1:>18} {2:>18} {3:>18}'.format(
+        'n', 'last, tracked', 'first, tracked', 'redrawn'))
+    for n in (1, 10, 50, 100, 200):
+        row = [n]
+        for moved, redraw in ((-1, False), (0, False), (-1, True)):
+            _cTurtle._destroyall()
+            pen = cTurtle.Pen()
+            pen.speed(0)
+            turtles = [pen] + [pen.clone() for _ in range(n - 1)]
+            for k, t in enumerate(turtles):
+                t.lt(360.0 * k / n)
+                t.fd(20)
+            counts = _count_calls(pen.getScreen(),
+                                  ['_drawpoly', '_drawline', '_drawimage',
+                                   '_raise'])
+            mover = turtles[moved]
+            if redraw:
+                # without tracking nothing is remembered as drawn
+                for name in ('_drawnsprite', '_drawnline'):
+                    setattr(_cTurtle.RawPen, name,
+                            property(lambda t: None, lambda t, value: None))
+
+            def run():
+                for i in range(steps):
+                    mover.fd(1)
+                    mover.lt(1)
+            try:
+                elapsed = _timed(run)
+            finally:
+                if redraw:
+                    del _cTurtle.RawPen._drawnsprite
+                    del _cTurtle.RawPen._drawnline
+            row.append(elapsed / steps * 1e6)
+            row.append(sum(counts.values()) / (3.0 * steps))
+        print('{0:>6} {1:>10.1f} {2:>7.1f} {3:>10.1f} {4:>7.1f} '
+              '{5:>10.1f} {6:>7.1f}'.format(*row))
+    _cTurtle._destroyall()
+
+
+def bench_clears(frames=300):
+    """Redraw a figure after clearing the drawing, reusing the deleted
+    items or creating new ones, which are deleted by the pen's tag."""
+    print('clears: time (us), items created and deletes per frame, '
+          'pool hits')
+    print('{0:>8} {1:>10} {2:>8} {3:>8} {4:>8}'.format(
+        'pool', 'time (us)', 'created', 'deletes', 'hits'))
+    for size in (1000, 0):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        pen.poolsize(size)
+        screen = pen.getScreen()
+        counts = _count_calls(screen, ['_createline', '_createpoly'])
+        deletes = _count_calls(screen, ['_delete'])
+
+        def run():
+            for frame in range(frames):
+                pen.clear()
+                pen.fill(True)
+                for i in range(4):
+                    pen.fd(50)
+                    pen.lt(90)
+                pen.fill(False)
+                for i in range(4):
+                    pen.penup()
+                    pen.fd(10)
+                    pen.pendown()
+                    pen.fd(10)
+        elapsed = _timed(run, 1)
+        print('{0:>8} {1:>10.1f} {2:>8.1f} {3:>8.1f} {4:>8}'.format(
+            size, elapsed / frames * 1e6,
+            sum(counts.values()) / float(frames),
+            deletes['_delete'] / float(frames), screen.poolhits))
+    _cTurtle._destroyall()
+
+
+def bench_lines(steps=3000):
+    """Draw a long path with one turtle, appending to the line items,
+    or resending the whole current line on every update and splitting
+    lines at 42 points as cTurtle used to."""
+    print('lines: time and points sent per step, line items of a path')
+    print('{0:>8} {1:>10} {2:>8} {3:>8}'.format('mode', 'time (us)',
+                                                'points', 'items'))
+    for mode in ('append', 'resend'):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        screen = pen.getScreen()
+        sent = [0]
+
+        def counting(method):
+            def wrap(item, coordlist=None, *args, **kwargs):
+                if coordlist is not None:
+                    sent[0] += len(coordlist)
+                return method(item, coordlist, *args, **kwargs)
+            return wrap
+        screen._drawline = counting(screen._drawline)
+        screen._extendline = counting(screen._extendline)
+        if mode == 'resend':
+            screen._LINESPLIT = 42
+            # without tracking nothing is remembered as drawn
+            _cTurtle.RawPen._drawnline = property(lambda t: None,
+                                                  lambda t, value: None)
+        items = len(screen.cv.items())
+
+        def run():
+            for i in range(steps):
+                pen.fd(i % 50 + 1)
+                pen.lt(89)
+        try:
+            elapsed = _timed(run, 1)
+        finally:
+            if mode == 'resend':
+                del _cTurtle.RawPen._drawnline
+        print('{0:>8} {1:>10.1f} {2:>8.1f} {3:>8}'.format(
+            mode, elapsed / steps * 1e6, sent[0] / float(steps),
+            len(screen.cv.items()) - items))
+    _cTurtle._destroyall()
+
+
+def bench_vectors(number=200000, steps=20000):
+    """Time the _Vec operations a turtle move uses, fused and spelled
+    with operators, and count the vectors made per forward()."""
+    _Vec = _cTurtle._Vec
+    a, b = _Vec(3.0, 4.0), _Vec(0.6, 0.8)
+    angle = 7.0
+    c, s = _cTurtle.math.cos(angle), _cTurtle.math.sin(angle)
+    print('vectors: time (ns) per operation')
+    for name, operation in (
+            ('a + b*k', lambda: a + b*2.5),
+            ('a.move(b, k)', lambda: a.move(b, 2.5)),
+            ('a.rotate(angle)', lambda: a.rotate(angle)),
+            ('a.turn(c, s)', lambda: a.turn(c, s))):
+        def run():
+            for _ in range(number):
+                operation()
+        print('{0:>16} {1:>8.1f}'.format(name, _timed(run) / number * 1e9))
+    print()
+    print('vectors: time (us) and vectors made per forward()')
+    print('{0:>10} {1:>10} {2:>8}'.format('mode', 'time (us)', 'vectors'))
+    made = [0]
+    vec = _cTurtle._vec
+    go = _cTurtle.TNavigator._go
+
+    def counting(xy):
+        made[0] += 1
+        return vec(xy)
+    for mode in ('fused', 'operators'):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        pen.hideturtle()
+        pen.penup()
+        if mode == 'operators':
+            # how _go moved the turtle before move() existed
+            _cTurtle.TNavigator._go = lambda t, distance: t._goto(
+                t._position + t._orient * distance)
+
+        def run():
+            for i in range(steps):
+                pen.fd(1)
+        _cTurtle._vec = counting
+        try:
+            elapsed = _timed(run, 1)
+        finally:
+            _cTurtle._vec = vec
+            _cTurtle.TNavigator._go = go
+        print('{0:>10} {1:>10.2f} {2:>8.1f}'.format(
+            mode, elapsed / steps * 1e6, made[0] / float(steps)))
+        made[0] = 0
+    _cTurtle._destroyall()
+
+
+def bench_circles(circles=300):
+    """Draw flower petals of circle arcs, going along the vertices of
+    the arcs at once, or moving to each of them in turn with an update
+    per step."""
+    print('circles: time (us) and screen updates per arc and turn')
+    print('{0:>10} {1:>10} {2:>8}'.format('mode', 'time (us)', 'updates'))
+    for mode in ('bulk', 'stepwise'):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        counts = _count_calls(pen.getScreen(), ['update'])
+        if mode == 'stepwise':
+            _cTurtle.RawPen._gotomany = _cTurtle.TNavigator._gotomany
+
+        def run():
+            for i in range(circles):
+                pen.circle(100, 60)
+                pen.lt(120)
+                pen.circle(100, 60)
+                pen.lt(63)
+        try:
+            elapsed = _timed(run, 1)
+        finally:
+            if mode == 'stepwise':
+                del _cTurtle.RawPen._gotomany
+        print('{0:>10} {1:>10.1f} {2:>8.1f}'.format(
+            mode, elapsed / (2 * circles) * 1e6,
+            counts['update'] / (2.0 * circles)))
+    _cTurtle._destroyall()
+
+
+def bench_paths(points=20000):
+    """Draw a computed curve, with goto_many or with goto for every
+    point, and curves of up to a million points with goto_many, whose
+    time per point should not grow with the length."""
+    import math
+    curve = [(200 * math.cos(k / 50.0) * math.sin(k / 31.0),
+              150 * math.sin(k / 40.0)) for k in range(points)]
+    print('paths: time (us) per point')
+    for mode in ('goto_many', 'goto'):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+
+        def run():
+            if mode == 'goto_many':
+                pen.goto_many(curve)
+            else:
+                for point in curve:
+                    pen.goto(point)
+        print('{0:>10} {1:>10.2f}'.format(mode,
+                                          _timed(run, 1) / points * 1e6))
+    print()
+    print('paths: time (us) per point of goto_many by length of the path')
+    for length in (100000, 300000, 1000000):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        long_curve = [(200 * math.cos(k / 50.0) * math.sin(k / 31.0),
+                       150 * math.sin(k / 40.0)) for k in range(length)]
+        print('{0:>10} {1:>10.2f}'.format(
+            length, _timed(lambda: pen.goto_many(long_curve), 1) /
+            length * 1e6))
+    _cTurtle._destroyall()
+
+
+def bench_programs(moves=100000):
+    """Draw a spiral of moves and turns, recorded as a Program and run
+    at once, generated for RawPen.run, or calling the pen for every
+    command, and run Programs and lsystem streams of up to a million
+    moves, whose time per move should not grow with the length."""
+    print('programs: time (us) per move and turn')
+    for mode in ('program', 'run', 'pen'):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+
+        def spiral():
+            for i in range(moves):
+                yield ('fd', i % 97 * 0.1 + 1)
+                yield ('lt', 89)
+
+        def run():
+            if mode == 'run':
+                pen.run(spiral())
+                return
+            turtle = cTurtle.Program() if mode == 'program' else pen
+            for i in range(moves):
+                turtle.fd(i % 97 * 0.1 + 1)
+                turtle.lt(89)
+            if mode == 'program':
+                turtle.run(pen)
+        print('{0:>10} {1:>10.2f}'.format(mode,
+                                          _timed(run, 1) / moves * 1e6))
+    print()
+    print('programs: time (us) per move of running a Program by its length')
+    for length in (100000, 300000, 1000000):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        program = cTurtle.Program()
+        for i in range(length):
+            program.fd(i % 97 * 0.1 + 1)
+            program.lt(89)
+        print('{0:>10} {1:>10.2f}'.format(
+            length, _timed(lambda: program.run(pen), 1) / length * 1e6))
+    print()
+    print('programs: time (us) per move of the Koch curve lsystem run by '
+          'RawPen.run')
+    for depth in (8, 9, 10):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+
+        def run():
+            pen.run(cTurtle.lsystem("F", {"F": "F+F--F+F"}, depth,
+                                    {"F": ("fd", 1), "+": ("lt", 60),
+                                     "-": ("rt", 60)}))
+        print('{0:>10} {1:>10.2f}'.format(4 ** depth,
+                                          _timed(run, 1) / 4 ** depth * 1e6))
+    _cTurtle._destroyall()
+
+
+def bench_raster():
+    """Rasterize random walks of many short segments, as the raster
+    backend's image() does. Needs NumPy."""
+    try:
+        from cTurtle.raster import rasterize
+    except ImportError:
+        print('raster: needs NumPy')
+        return
+    import random
+    print('raster: time (us) per segment of rasterizing a line')
+    random.seed(1)
+    for segments in (10000, 100000):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        x = y = 0.0
+        walk = []
+        for _ in range(segments):
+            x = max(-390, min(390, x + random.uniform(-2, 2)))
+            y = max(-290, min(290, y + random.uniform(-2, 2)))
+            walk.append((x, y))
+        pen.goto_many(walk)
+        canvas = pen.getCanvas()
+        print('{0:>10} {1:>10.2f}'.format(
+            segments, _timed(lambda: rasterize(canvas), 1) / segments * 1e6))
+    _cTurtle._destroyall()
+
+
+def bench_shapes(steps=5000):
+    """Turn a turtle of a compound shape, stretched by turtlesize, with
+    the stretched shape remembered, or stretched again for every
+    redraw."""
+    print('shapes: time (us) per turn of a compound shape')
+    shape = _cTurtle.Shape("compound")
+    for k in range(8):
+        shape.addComponent(((0, 0), (10, k), (k, 10), (-10, -5)), "red")
+    scaled = _cTurtle.Shape._scaled
+    for mode in ('cached', 'stretched'):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        pen.addshape("star", shape)
+        pen.shape("star")
+        pen.turtlesize(3)
+        if mode == 'stretched':
+            def stretch(shape, factor):
+                shape._scalings.clear()
+                return scaled(shape, factor)
+            _cTurtle.Shape._scaled = stretch
+
+        def run():
+            for i in range(steps):
+                pen.lt(1)
+        try:
+            elapsed = _timed(run, 1)
+        finally:
+            _cTurtle.Shape._scaled = scaled
+        print('{0:>10} {1:>10.2f}'.format(mode, elapsed / steps * 1e6))
+    _cTurtle._destroyall()
+
+
+def bench_sprites(steps=200, n=50):
+    """Move n turtles of a compound shape, drawing their components
+    again, or moving them with the sprite cache."""
+    print('sprites: time (us) and screen calls per move of a compound '
+          'turtle')
+    print('{0:>10} {1:>10} {2:>8}'.format('step', 'time (us)', 'calls'))
+    shape = _cTurtle.Shape("compound")
+    for k in range(8):
+        shape.addComponent(((0, 0), (10, k), (k, 10), (-10, -5)), "red")
+    for step in (0, 5):
+        _cTurtle._destroyall()
+        pen = cTurtle.Pen()
+        pen.speed(0)
+        pen.penup()
+        pen.spritecache(step)
+        pen.addshape("star", shape)
+        pen.shape("star")
+        turtles = [pen] + [pen.clone() for _ in range(n - 1)]
+        for k, t in enumerate(turtles):
+            t.lt(360.0 * k / n)
+        counts = _count_calls(pen.getScreen(), ['_drawpoly', '_move'])
+
+        def run():
+            for i in range(steps):
+                for t in turtles:
+                    t.fd(1)
+        elapsed = _timed(run, 1)
+        print('{0:>10} {1:>10.1f} {2:>8.1f}'.format(
+            step, elapsed / (steps * n) * 1e6,
+            sum(counts.values()) / float(steps * n)))
+    _cTurtle._destroyall()
+
+
+BENCHMARKS = {
+    'circles': bench_circles,
+    'clears': bench_clears,
+    'lines': bench_lines,
+    'paths': bench_paths,
+    'programs': bench_programs,
+    'raster': bench_raster,
+    'shapes': bench_shapes,
+    'sprites': bench_sprites,
+    'turtles': bench_turtles,
+    'vectors': bench_vectors,
+}
+
+
+def main(argv=None):
+    names = (sys.argv[1:] if argv is None else argv) or sorted(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print('Unknown benchmark {0}, choose from {1}'.format(
+                name, ', '.join(sorted(BENCHMARKS))))
+            return 1
+    for name in names:
+        BENCHMARKS[name]()
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
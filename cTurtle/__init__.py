@@ -1,12 +1,19 @@
 from .cTurtle import *
+from .program import Program, lsystem
 from turtlecapture import register, replaced_function
 
 
 def canvas_callback():
     from . import cTurtle as _cTurtle  # Needed to get the _
+    _cTurtle._flushall()
     return _cTurtle._canvas
 
 
+def reset_callback():
+    from . import cTurtle as _cTurtle
+    _cTurtle._destroyall()
+
+
 def register_callback():
     global mainloop
     # Monkey patch to allow for scripting
@@ -14,13 +21,16 @@ def register_callback():
     TurtleScreen.onTimer = replaced_function('onTimer')
     TurtleScreenBase._delay = replaced_function('_delay', display_once=True)
     mainloop = replaced_function('mainloop')
+    # Nobody watches the animation, only the final drawing is saved
+    TurtleScreen._INSTANT = True
 
 
-register(canvas_callback, register_callback)
+register(canvas_callback, register_callback, reset_callback)
 
 
 # Cleanup namespace
 del canvas_callback
 del register
 del register_callback
+del reset_callback
 del replaced_function
@@ -98,10 +98,15 @@ complexity and a very simple q&d assembled demo viewer.
 
 import tkinter as TK
 import types
+import re
 import math           ## for compatibility: from math import *   ???
+import os
 
 from os.path import isfile
 from copy import deepcopy
+from functools import partial
+
+from .colors import torgb
 
 def __methodDict(cls, _dict):
     baseList = list(cls.__bases__)
@@ -258,36 +263,118 @@ class _Vec(tuple):
        k*a and a*k multiplication with scalar
        |a| absolute value of a
        a.rotate(angle) rotation       
+       a.move(b, k) a+b*k in one step, e.g. a point moved along
+                    the heading b
+       a.turn(c, s) rotation by the angle with cosine c and sine s
     """
+    __slots__ = ()
+
     def __new__(cls, x, y):
         return tuple.__new__(cls, (x, y))
     def __add__(self, other):
-        return _Vec(self[0]+other[0], self[1]+other[1])
+        x, y = self
+        return _vec((x+other[0], y+other[1]))
     def __mul__(self, other):
+        x, y = self
         if isinstance(other, _Vec):
-            return self[0]*other[0]+self[1]*other[1]
-        return _Vec(self[0]*other, self[1]*other)
+            return x*other[0]+y*other[1]
+        return _vec((x*other, y*other))
     def __rmul__(self, other):
         if isinstance(other, int) or isinstance(other, float):
-            return _Vec(self[0]*other, self[1]*other)
+            x, y = self
+            return _vec((x*other, y*other))
     def __sub__(self, other):
-        return _Vec(self[0]-other[0], self[1]-other[1])
+        x, y = self
+        return _vec((x-other[0], y-other[1]))
     def __neg__(self):
-        return _Vec(-self[0], -self[1])
+        x, y = self
+        return _vec((-x, -y))
     def __abs__(self):
-        return (self[0]**2 + self[1]**2)**0.5
+        x, y = self
+        return (x**2 + y**2)**0.5
     def rotate(self, angle):
         """rotate self counterclockwise by angle
         """
-        perp = _Vec(-self[1], self[0])
-        angle = angle * math.pi / 180.0
-        c, s = math.cos(angle), math.sin(angle)
-        return _Vec(self[0]*c+perp[0]*s, self[1]*c+perp[1]*s)
+        c, s = _rotation(angle)
+        return self.turn(c, s)
+    def turn(self, c, s):
+        """rotate self counterclockwise by the angle with
+        cosine c and sine s
+        """
+        x, y = self
+        return _vec((x*c-y*s, y*c+x*s))
+    def move(self, direction, distance):
+        """return self moved by distance along direction,
+        i.e. self + direction*distance
+        """
+        x, y = self
+        dx, dy = direction
+        return _vec((x+dx*distance, y+dy*distance))
     def __getnewargs__(self):
         return (self[0], self[1])
     def __repr__(self):
         return "(%.2f,%.2f)" % self 
 
+# _vec((x, y)) makes the same vector as _Vec(x, y), without calling
+# _Vec.__new__
+_vec = partial(tuple.__new__, _Vec)
+
+def _pairs(points):
+    """Return points, a list of pairs or a NumPy array of shape (n, 2),
+    as a list of pairs."""
+    if hasattr(points, "tolist"):
+        return list(map(tuple, points.tolist()))
+    return points
+
+_rotations = {}         # (angle, degreesPerAU) -> (cosine, sine)
+_ROTATIONSSIZE = 256
+
+def _rotation(angle, degreesPerAU=1.0):
+    """Return cosine and sine of angle, measured in units of
+    degreesPerAU degrees.
+
+    Multiples of 90 degrees give exactly 0, 1 and -1, so turtles
+    turning by right angles keep exact headings. The results of up to
+    _ROTATIONSSIZE different angles are remembered.
+    """
+    key = (angle, degreesPerAU)
+    try:
+        return _rotations[key]
+    except KeyError:
+        pass
+    angle = angle * degreesPerAU
+    if angle % 90 == 0:
+        cs = ((1, 0), (0, 1), (-1, 0), (0, -1))[int(angle // 90) % 4]
+    else:
+        angle = angle * math.pi / 180.0
+        cs = (math.cos(angle), math.sin(angle))
+    if len(_rotations) >= _ROTATIONSSIZE:
+        _rotations.clear()
+    _rotations[key] = cs
+    return cs
+
+
+# images of gif-files shared by all screens, least recently used first,
+# see TurtleScreenBase._loadimage
+_images = {}            # (screen class, path, mtime, size) -> image
+_imagebytes = 0         # decoded size of the images in _images
+_IMAGECACHESIZE = 64 * 1024 * 1024
+
+
+_TCLPLAIN = re.compile(r"[\w#.+-]+\Z")
+
+def _tclword(value):
+    """Quote value as one word of a Tcl command."""
+    if isinstance(value, float):
+        return repr(value)
+    value = str(value)
+    if _TCLPLAIN.match(value):
+        return value
+    if "\\" not in value and value.count("{") == value.count("}") == 0:
+        return "{" + value + "}"
+    return re.sub(r'([\\\[\]{}"$;\s])',
+                  lambda m: "\\n" if m.group(1) == "\n" else "\\" + m.group(1),
+                  value)
 
 class TurtleScreenBase(object):
     """Provides the basic graphics functionality.
@@ -298,6 +385,18 @@ class TurtleScreenBase(object):
        implemented.
     """
     # TODO Add patches to this class.
+
+    # Points per line item. Points are appended to a line item as the
+    # pen moves, but Tk redraws the whole item whenever part of it must
+    # be redisplayed, so overly long items slow down the animation.
+    _LINESPLIT = 500
+
+    # Points per line item cTurtle used to split lines at. Lines are
+    # still stacked as if they were split there, see RawPen._chunked.
+    _LINECHUNK = 42
+
+    # Number of widths of written texts a screen remembers, see _textwidth
+    _TEXTWIDTHSSIZE = 4096
     
     @staticmethod
     def _blankimage():
@@ -314,6 +413,41 @@ class TurtleScreenBase(object):
         """
         return TK.PhotoImage(file=filename)
 
+    @staticmethod
+    def _imagevalid(image):
+        """returns whether image, made by _image, can still be shown,
+        i.e. belongs to the current Tk interpreter.
+        """
+        root = TK._default_root
+        return root is not None and image.tk is root.tk
+
+    @classmethod
+    def _loadimage(cls, filename):
+        """returns an image object like _image, which is shared with
+        all screens that load the gif-file filename while it does not
+        change. The images are kept up to a decoded size of
+        _IMAGECACHESIZE bytes, dropping the least recently used.
+        """
+        global _imagebytes
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return cls._image(filename)
+        key = (cls, os.path.abspath(filename), stat.st_mtime_ns,
+               stat.st_size)
+        image = _images.pop(key, None)
+        if image is not None and not cls._imagevalid(image):
+            _imagebytes -= 4 * image.width() * image.height()
+            image = None
+        if image is None:
+            image = cls._image(filename)
+            _imagebytes += 4 * image.width() * image.height()
+        _images[key] = image
+        while _imagebytes > _IMAGECACHESIZE and len(_images) > 1:
+            old = _images.pop(next(iter(_images)))
+            _imagebytes -= 4 * old.width() * old.height()
+        return image
+
     def __init__(self, cv): 
         self.cv = cv
         if isinstance(cv, ScrolledCanvas):
@@ -327,6 +461,79 @@ class TurtleScreenBase(object):
         self.canvheight = h
         self.xscale = 1.0
         self.yscale = 1.0        
+        # Canvas commands are collected and sent to Tcl as one script
+        # when the screen is updated, see _flushcommands
+        self._commands = []
+        self._commandcalls = 0
+        self.savedroundtrips = 0
+        # Widths in pixels of written texts, by (text, font), and
+        # advances of characters, by font then character, measured on
+        # this screen's display, see _textwidth
+        self._textwidths = {}
+        self._advances = {}
+
+    def _command(self, calls, *args):
+        """Queue the canvas widget command args, which replaces
+        calls separate calls of Tkinter canvas methods.
+        """
+        self._commands.append(" ".join([_tclword(arg) for arg in args]))
+        self._commandcalls += calls
+
+    def _flushcommands(self):
+        """Send the queued canvas commands. Must be called before
+        anything which depends on their order or effect, like creating
+        items or querying the canvas.
+        """
+        if not self._commands:
+            return
+        canvas = getattr(self.cv, "_canvas", self.cv)
+        commands = [canvas._w + " " + command for command in self._commands]
+        self.savedroundtrips += self._commandcalls - 1
+        self._commands = []
+        self._commandcalls = 0
+        failed = None
+        while commands:
+            try:
+                canvas.tk.eval("\n".join(commands))
+                break
+            except TK.TclError as error:
+                # the commands before the failed one were carried out,
+                # the ones after it still are
+                n = self._failedcommand(canvas, commands)
+                if failed is None:
+                    failed = (error, commands[n])
+                commands = commands[n+1:]
+        if failed is not None:
+            raise TK.TclError("%s\n    in canvas command %s" % failed)
+
+    @staticmethod
+    def _failedcommand(canvas, commands):
+        """Return the index of the command of commands which failed,
+        according to the errorInfo Tcl left, which quotes its first
+        150 characters. If none matches, the last index is returned.
+        """
+        source = canvas.tk.getvar("errorInfo").rsplit("\n", 1)[-1]
+        source = source[1:-1]
+        if source.endswith("..."):
+            source = source[:-3]
+        for n, command in enumerate(commands):
+            if command.startswith(source):
+                return n
+        return len(commands) - 1
+
+    def _itemconfigure(self, item, top, **options):
+        """Queue the configuration of item with the options which
+        are not None, and raise it if top is true.
+        """
+        args = []
+        for option, value in options.items():
+            if value is not None:
+                args.append("-" + option)
+                args.append(value)
+        if args:
+            self._command(len(args) // 2, "itemconfigure", item, *args)
+        if top:
+            self._command(1, "raise", item)
 
     def getXScale(self):
         return self.xscale
@@ -358,6 +565,7 @@ class TurtleScreenBase(object):
     def _createpoly(self):
         """Creates an invisible polygon item on canvas self.cv) 
         """
+        self._flushcommands()
         return self.cv.create_polygon((0, 0, 0, 0, 0, 0), fill="", outline="")
 
     def _drawpoly(self, polyitem, coordlist, fill=None,
@@ -382,19 +590,14 @@ class TurtleScreenBase(object):
                 y = y * self.yscale
             cl.append(x)
             cl.append(-y)
-        self.cv.coords(polyitem, *cl)
-        if fill is not None:
-            self.cv.itemconfigure(polyitem, fill=fill)
-        if outline is not None:
-            self.cv.itemconfigure(polyitem, outline=outline)
-        if width is not None:
-            self.cv.itemconfigure(polyitem, width=width)
-        if top:
-            self.cv.tag_raise(polyitem)
+        self._command(1, "coords", polyitem, *cl)
+        self._itemconfigure(polyitem, top, fill=fill, outline=outline,
+                            width=width)
             
     def _createline(self):
         """Creates an invisible line item on canvas self.cv) 
         """
+        self._flushcommands()
         return self.cv.create_line(0, 0, 0, 0, fill="", width=2,
                                    capstyle = TK.ROUND)
 
@@ -417,22 +620,52 @@ class TurtleScreenBase(object):
                     y = y * self.yscale
                 cl.append(x)
                 cl.append(-y)
-            self.cv.coords(lineitem, *cl)
-        if fill is not None:
-            self.cv.itemconfigure(lineitem, fill=fill)
-        if width is not None:
-            self.cv.itemconfigure(lineitem, width=width)
-        if top:
-            self.cv.tag_raise(lineitem)
+            self._command(1, "coords", lineitem, *cl)
+        self._itemconfigure(lineitem, top, fill=fill, width=width)
+
+    def _extendline(self, lineitem, coordlist, xform=True):
+        """appends the points of coordlist to lineitem
+        """
+        cl = []
+        for x, y in coordlist:
+            if xform:
+                x = x * self.xscale
+                y = y * self.yscale
+            cl.append(x)
+            cl.append(-y)
+        self._command(1, "insert", lineitem, "end",
+                      " ".join([repr(float(c)) for c in cl]))
 
     def _delete(self, item):
-        """deletes graphics item from canvas
+        """deletes graphics item, or all items tagged item, from canvas
+        """
+        self._command(1, "delete", item)
+
+    def _raise(self, item):
+        """puts item, or all items tagged item, on top of the
+        canvas' displaylist
+        """
+        self._command(1, "raise", item)
+
+    def _tag(self, item, tag):
+        """adds tag to the tags of item
+        """
+        self._command(1, "addtag", tag, "withtag", item)
+
+    def _move(self, item, dx, dy):
+        """moves item, or all items tagged item, by dx, dy
+        """
+        self._command(1, "move", item, float(dx), float(-dy))
+
+    def _untag(self, item):
+        """removes all tags of item
         """
-        self.cv.delete(item)
+        self._command(1, "itemconfigure", item, "-tags", "")
 
     def _update(self):
         """readraws graphics items on canvas
         """
+        self._flushcommands()
         self.cv.update()
 
     def _delay(self, delay):
@@ -442,7 +675,13 @@ class TurtleScreenBase(object):
     def _isColorString(self, color):
         """Checks if the string color is a legal
         Tkinter color string.
+
+        Names of the X11 color database and hexadecimal specifications
+        are checked without asking Tk, which is only asked for the
+        platform specific colors, e.g. SystemButtonFace.
         """
+        if torgb(color) is not None:
+            return True
         try:
             rgb = self.cv.winfo_rgb(color)
             ok = True
@@ -459,22 +698,63 @@ class TurtleScreenBase(object):
         else:
             return self.cv.cget("bg")
         
-    def _write(self, pos, txt, align, font, pencolor):
+    def _write(self, pos, txt, align, font, pencolor, move=True):
         """Write txt at pos in canvas with specified font
         and color.
         Return text item and x-coord of right bottom corner
-        of text's bounding box."""
+        of text's bounding box, or None if move is false."""
         x, y = pos
         anchor = {"left":"sw", "center":"s", "right":"se" }
         xscale = self.getXScale()
         yscale = self.getYScale() 
         nx = x * xscale
         ny = y * yscale
+        self._flushcommands()
         item = self.cv.create_text(nx-1, -ny, text = txt, anchor = anchor[align],
                                         fill = pencolor, font = font)
-        x0, y0, x1, y1 = self.cv.bbox(item)
-        self.cv.update()
-        return item, x1-1
+        if not move:
+            return item, None
+        width = self._textwidth(txt, font)
+        if width is None:
+            x0, y0, x1, y1 = self.cv.bbox(item)
+            return item, x1-1
+        # Tk rounds the anchor position and pads the bounding box by 1
+        left = int(math.floor(nx - 0.5))
+        left -= {"left": 0, "center": width // 2, "right": width}[align]
+        return item, left + width
+
+    def _textwidth(self, txt, font):
+        """Return the width in pixels of the single line txt written
+        in font, the sum of the advances of its characters, which are
+        measured once per font. Return None for texts which Tk lays
+        out differently, e.g. with tabs or several lines.
+        """
+        if isinstance(font, list):
+            font = tuple(font)
+        key = (txt, font)
+        try:
+            width = self._textwidths.get(key)
+        except TypeError:   # font not hashable
+            return None
+        if width is not None:
+            return width
+        if not txt.isprintable():
+            return None
+        advances = self._advances.setdefault(font, {})
+        width = 0
+        for char in txt:
+            advance = advances.get(char)
+            if advance is None:
+                advance = advances[char] = self._measure(char, font)
+            width += advance
+        if len(self._textwidths) >= self._TEXTWIDTHSSIZE:
+            self._textwidths.clear()
+        self._textwidths[key] = width
+        return width
+
+    def _measure(self, txt, font):
+        """Return the width in pixels of txt written in font."""
+        return int(self.cv.tk.call("font", "measure", font, txt))
 
     def _onClick(self, fun, num=1): 
         """Bind fun to mouse-click event on canvas.
@@ -517,6 +797,7 @@ class TurtleScreenBase(object):
     def _createimage(self, image):
         """Create and return image item on canvas.
         """
+        self._flushcommands()
         return self.cv.create_image(0, 0, image=image)
 
     def _drawimage(self, item, xxx_todo_changeme, image):
@@ -524,16 +805,16 @@ class TurtleScreenBase(object):
         at position (x,y) on canvas)
         """
         (x, y) = xxx_todo_changeme
-        self.cv.coords(item, (x, -y))
-        self.cv.itemconfig(item, image=image)
+        self._command(1, "coords", item, float(x), float(-y))
+        self._command(1, "itemconfigure", item, "-image", image)
 
     def _setbgpic(self, item, image):
         """Configure image item as to draw image object
         at center of canvas. Set item to the first item
         in the displaylist, so it will be drawn below
         any other item ."""
-        self.cv.itemconfig(item, image=image)
-        self.cv.tag_lower(item)
+        self._command(1, "itemconfigure", item, "-image", image)
+        self._command(1, "lower", item)
         
 #### Rudiments of Error hanling with these classes
 #### Urgently need to be amended.
@@ -575,15 +856,22 @@ class Shape(object):
     attribute _data is - depending on _type a poygon-tuple,
     an image or a list constructed using the addComponent method.
     """
+    _SCALINGSSIZE = 16
+    _TURNINGSSIZE = 1024
+
     def __init__(self, type, data=None):
         self._type = type
+        self._scalings = {}     # factor -> polygons, see _scaled
+        self._turnings = {}     # (factor, step, k) -> polygons, see _turned
+        self._file = None       # gif-file of an image shape, see addshape
         if type == "polygon":
             if isinstance(data, list):
                 data = tuple(data)
         elif type == "image":
             if isinstance(data, str):
                 if data.lower().endswith(".gif") and isfile(data):
-                    data = TurtleScreen._image(data)
+                    # loaded by the screens the shape is added to
+                    self._file = data
                 # else data assumed to be Photoimage
         elif type == "compound":
             data = []
@@ -613,6 +901,47 @@ class Shape(object):
             outline = fill
         checkargs("polygon", "color", "color")
         self._data.append([poly, fill, outline])
+        self._scalings.clear()
+        self._turnings.clear()
+
+    def _scaled(self, factor):
+        """Return the polygons of a polygon or compound shape, one per
+        component, with their coordinates multiplied by factor. The
+        results of up to _SCALINGSSIZE factors are remembered.
+        """
+        try:
+            return self._scalings[factor]
+        except KeyError:
+            pass
+        if self._type == "polygon":
+            polys = (self._data,)
+        else:
+            polys = [poly for poly, fill, outline in self._data]
+        polys = tuple([tuple([(factor*x, factor*y) for (x, y) in poly])
+                       for poly in polys])
+        if len(self._scalings) >= self._SCALINGSSIZE:
+            self._scalings.clear()
+        self._scalings[factor] = polys
+        return polys
+
+    def _turned(self, factor, step, orient):
+        """Return the polygons of _scaled(factor) turned to heading
+        orient, rounded to a multiple of step degrees. The results of
+        up to _TURNINGSSIZE headings and factors are remembered.
+        """
+        heading = math.degrees(math.atan2(orient[1], orient[0])) % 360
+        key = (factor, step, int(round(heading / step)))
+        try:
+            return self._turnings[key]
+        except KeyError:
+            pass
+        e0, e1 = _rotation(key[2] * step)
+        polys = tuple([tuple([(e1*x+e0*y, -e0*x+e1*y) for (x, y) in poly])
+                       for poly in self._scaled(factor)])
+        if len(self._turnings) >= self._TURNINGSSIZE:
+            self._turnings.clear()
+        self._turnings[key] = polys
+        return polys
 
 
 class TurtleScreen(TurtleScreenBase):
@@ -628,6 +957,12 @@ class TurtleScreen(TurtleScreenBase):
     """
     _STANDARD_DELAY = 5
     _RUNNING = True
+    _INSTANT = False    # if True, pens do not animate and drawing
+                        # is deferred until the next forced update
+    _colors = {}        # color arguments -> color string, see _color
+    _COLORCACHESIZE = 1024
+    _POOLSIZE = 1000    # released items kept per kind, see poolsize
+    _TURTLELAYER = "turtles"    # tag of the turtles' shape items
 
     def __init__(self, cv):   
         self._shapes = { # triangle
@@ -658,6 +993,20 @@ class TurtleScreen(TurtleScreenBase):
         self._delayvalue = 10
         self._updatecounter = 0
         self._turtles = []
+        self._dirty = []        # the turtles to draw at the next update
+        self._drawnscale = None # xscale and yscale they were drawn at
+        self._stackcount = 0    # incremented when an item is put on top
+        self._layered = 0       # _stackcount when the turtles were raised
+        # released line and polygon items, hidden for reuse
+        self._pool = {"line": [], "poly": []}
+        self._poolkinds = {}    # item -> "line" or "poly", if poolable
+        self._free = set()      # the items in the pool
+        self._owners = {}       # item -> tag of the pen whose drawing it is
+        self._poolsize = self._POOLSIZE
+        self.poolhits = 0
+        self.poolmisses = 0
+        self._spritestep = 0    # heading step of cached sprites, see spritecache
+        self._groups = 0        # number of sprite tags handed out
 
     def addshape(self, name, shape=None):
         """Adds a turtle shape to TurtleScreen's shapelist.
@@ -686,11 +1035,14 @@ class TurtleScreen(TurtleScreenBase):
         if shape is None:
             # image
             if name.lower().endswith(".gif"):
-                shape = Shape("image", self._image(name))
+                shape = Shape("image", self._loadimage(name))
             else:
                 raise
         elif isinstance(shape, tuple):
             shape = Shape("polygon", shape)
+        elif shape._file is not None:
+            # an image of the kind this screen draws
+            shape = Shape("image", self._loadimage(shape._file))
         ## else shape assumed to be Shape-instance
         self._shapes[name] = shape       
 
@@ -703,7 +1055,41 @@ class TurtleScreen(TurtleScreenBase):
 
         If the argument doesn't represent a color,
         an error is raised.
+
+        The color strings of up to _COLORCACHESIZE
+        different arguments are remembered.
         """
+        try:
+            key = self._colorkey(args)
+            color = self._colors.get(key)
+        except TypeError:   # neither hashable nor a sequence
+            key = color = None
+        if color is None:
+            color = self._tocolor(args)
+            if key is not None:
+                if len(self._colors) >= self._COLORCACHESIZE:
+                    self._colors.clear()
+                self._colors[key] = color
+        return color
+
+    def _colorkey(self, args):
+        """Return the key of args in the color cache. Raises TypeError
+        if args cannot be a key.
+
+        The key of a color string is the string itself, the key of
+        numbers also holds the colormode and their types, which tell
+        e.g. 255 from 255.0.
+        """
+        if len(args) == 1:
+            args = args[0]
+        if isinstance(args, str):
+            return args
+        if not isinstance(args, (tuple, list)):
+            raise TypeError("not a color key")
+        return (self._colormode,) + tuple(args) + tuple(map(type, args))
+
+    def _tocolor(self, args):
+        """Convert args to a color string, see _color."""
         if len(args) == 1:
             color = args[0]
             if color == "":
@@ -840,6 +1226,165 @@ class TurtleScreen(TurtleScreenBase):
             return self._delayvalue
         self._delayvalue = int(delay)
 
+    def poolsize(self, size=None):
+        """ Return or set the number of deleted line and polygon
+        items which are kept hidden for reuse, so pens which clear
+        their drawings again and again do not create ever new items.
+        ---
+        Argument: None or nonnegative integer
+
+        call: poolsize(<nonnegative integer>)
+        --or: poolsize()
+
+        Example (for a TurtleScreen instance named screen):
+        >>> screen.poolsize(100)
+        >>> screen.poolsize()
+        100
+        """
+        checkargs("positive")
+        if size is None:
+            return self._poolsize
+        self._poolsize = int(size)
+        for pool in self._pool.values():
+            while len(pool) > self._poolsize:
+                item = pool.pop()
+                self._free.discard(item)
+                del self._poolkinds[item]
+                self._delete(item)
+
+    def spritecache(self, step=None):
+        """ Return or set the heading step in degrees of the sprite
+        cache. With a step, the turtles of compound shapes are drawn
+        at their heading rounded to a multiple of step, from shapes
+        turned once per heading, and turtles of compound and image
+        shapes which only changed their position are moved rather
+        than drawn again. 0 turns the cache off, which is the default.
+        ---
+        Argument: None or nonnegative number
+
+        call: spritecache(<nonnegative number>)
+        --or: spritecache()
+
+        Example (for a TurtleScreen instance named screen):
+        >>> screen.spritecache(5)
+        >>> screen.spritecache()
+        5
+        """
+        checkargs("positive")
+        if step is None:
+            return self._spritestep
+        self._spritestep = step
+        for t in self._turtles:
+            t._drawnsprite = t._spritepose = None
+        self._touch(self._turtles)
+
+    def _touch(self, turtles):
+        """Have the turtles drawn at the next update, though their
+        pose and looks did not change, see RawPen._update.
+        """
+        for t in turtles:
+            if not t._dirty:
+                t._dirty = True
+                self._dirty.append(t)
+
+    def _newitem(self, kind):
+        """Return an invisible item of kind "line" or "poly" on top of
+        the canvas, like _createline and _createpoly, reusing a released
+        item if there is one. Counts poolhits and poolmisses.
+        """
+        pool = self._pool[kind]
+        if pool:
+            self.poolhits += 1
+            item = pool.pop()
+            self._free.discard(item)
+            self._raise(item)
+            return item
+        self.poolmisses += 1
+        if kind == "line":
+            item = self._createline()
+        else:
+            item = self._createpoly()
+        self._poolkinds[item] = kind
+        return item
+
+    def _currentlines(self):
+        """Return the set of items the turtles draw their lines in."""
+        return set([t.currentLineItem for t in self._turtles])
+
+    def _release(self, item, inuse=None):
+        """Delete item from the canvas, or hide it for reuse by
+        _newitem if it is a line or polygon item made by _newitem
+        and the pool is not full. Items in inuse, by default the
+        current lines of the turtles, are never reused.
+        """
+        self._owners.pop(item, None)
+        if item in self._free:
+            return
+        if inuse is None:
+            inuse = self._currentlines()
+        kind = self._poolkinds.get(item)
+        if (kind is None or len(self._pool[kind]) >= self._poolsize or
+                item in inuse):
+            self._poolkinds.pop(item, None)
+            self._delete(item)
+            return
+        # back to the state the item was created in
+        self._untag(item)
+        if kind == "line":
+            self._drawline(item, ((0, 0), (0, 0)), fill="", width=2,
+                           xform=False)
+        else:
+            self._drawpoly(item, ((0, 0), (0, 0), (0, 0)), fill="",
+                           outline="", width=1, xform=False)
+        self._pool[kind].append(item)
+        self._free.add(item)
+
+    def _releasetagged(self, items, tag):
+        """Release items, which are all tagged tag. As many as the pool
+        has room for are kept for reuse, the others are deleted at once
+        by their tag.
+        """
+        room = sum([self._poolsize - len(pool) for pool in self._pool.values()])
+        inuse = self._currentlines()
+        for item in items:
+            if room <= 0:
+                break
+            kind = self._poolkinds.get(item)
+            if (kind is not None and item not in self._free and
+                    item not in inuse and
+                    len(self._pool[kind]) < self._poolsize):
+                self._release(item, inuse)
+                room -= 1
+        self._delete(tag)
+        for item in items:
+            self._owners.pop(item, None)
+            if item not in self._free:
+                self._poolkinds.pop(item, None)
+
+    def _newsprite(self):
+        """Return a new polygon item for a turtle's shape, tagged as
+        part of the turtles' layer."""
+        item = self._newitem("poly")
+        self._tag(item, self._TURTLELAYER)
+        return item
+
+    def _newgroup(self, items):
+        """Tag items, the parts of a turtle's shape, with a new tag,
+        which moves them together, and return the tag."""
+        self._groups += 1
+        group = "sprite%d" % self._groups
+        for item in items:
+            self._tag(item, group)
+        return group
+
+    def _raiseturtles(self):
+        """Put the turtles' shapes on top of the canvas' displaylist,
+        keeping their order, if other items were put on top of them.
+        """
+        if self._layered != self._stackcount:
+            self._raise(self._TURTLELAYER)
+            self._layered = self._stackcount
+
     def _incrementudc(self):
         if self._tracing > 0:
             self._updatecounter += 1
@@ -850,6 +1395,8 @@ class TurtleScreen(TurtleScreenBase):
             raise Terminator
         if self._tracing == 0 and not forced:
             return
+        if TurtleScreen._INSTANT and not forced:
+            return
         if self._updatecounter == 0 or forced:
             self._update()
             self._delay(self._delayvalue)
@@ -1010,10 +1557,14 @@ class TurtleScreen(TurtleScreenBase):
         """
         if picname is None:
             return self._bgpicname
-        if picname not in self._bgpics:
-            self._bgpics[picname] = self._image(picname)
-        self._setbgpic(self._bgpic, self._bgpics[picname])
+        image = self._bgpics.get(picname)
+        if image is None:
+            image = self._loadimage(picname)
+        self._setbgpic(self._bgpic, image)
         self._bgpicname = picname
+        # only the shown picture is kept here, the others are kept
+        # by the image cache
+        self._bgpics = {"nopic": "", picname: image}
         
     def colorpatch(self,x,y):
         """docstring for colorpatch"""
@@ -1128,13 +1679,12 @@ class TNavigator(object):
 
     def _go(self, distance):
         """Bewegt die Turtle um distance nach vorne"""
-        ende = self._position + self._orient * distance    
-        self._goto(ende)
+        self._goto(self._position.move(self._orient, distance))
 
     def _rotate(self, angle):
         """Dreht turtle um angle Grad nach links"""
-        angle *= self._degreesPerAU
-        self._orient = self._orient.rotate(angle)
+        c, s = _rotation(angle, self._degreesPerAU)
+        self._orient = self._orient.turn(c, s)
 
     def _goto(self, end):
         """Bewegt die Turtle nach end""" 
@@ -1294,6 +1844,34 @@ class TNavigator(object):
         else:
             self._goto(_Vec(pos, y))
 
+    def goto_many(self, points):
+        """Move turtle to each of the positions points in turn, as goto
+        does for every one of them. Unless the moves are animated, the
+        lines are drawn and the screen is updated at once.
+        ---
+        Argument: a sequence of pairs of numbers, e.g. a list of
+        tuples or a NumPy array of shape (n, 2)
+
+        call: goto_many(<sequence of pairs>)
+
+        Example (for a Pen instance named turtle):
+        >>> turtle.goto_many([(0, 0), (100, 0), (100, 100)])
+        >>> turtle.pos()
+        (100.00,100.00)
+        """
+        checkargs("positions")
+        if hasattr(points, "tolist"):   # NumPy array
+            if not self._animated():
+                # converted to pairs one chunk at a time
+                self._gotomany(points.reshape(-1, 2))
+                return
+            points = points.tolist()
+        points = [_vec((x, y)) for x, y in points]
+        if self._animated():
+            TNavigator._gotomany(self, points)
+        else:
+            self._gotomany(points)
+
     def setx(self, x):
         """Set the turtle's first coordinate to x
         Second coordinate remains unchanged.
@@ -1469,29 +2047,55 @@ class TNavigator(object):
         if extent is None:
             extent = self._fullcircle 
         if steps is None:
-            frac = abs(extent)/self._fullcircle 
-            steps = 1+int(min(11+abs(radius)/6.0, 59.0)*frac)
+            steps = self._arcsteps(radius, extent)
         w = 1.0 * extent / steps
         w2 = 0.5 * w
         l = 2.0 * radius * math.sin(w2*math.pi/180.0*self._degreesPerAU) 
         if radius < 0:
             l, w, w2 = -l, -w, -w2
-        tr = self.tracer()
-        dl = self.delay()
-        if speed == 0:
-            self.tracer(0, 0)
-        else:
+        if self._animated():
             self.speed(0)
-        self._rotate(w2)
-        for i in range(steps):
+            self._rotate(w2)
+            for i in range(steps):
+                self.speed(speed)
+                self._go(l)
+                self.speed(0)
+                self._rotate(w)
+            self._rotate(-w2)
             self.speed(speed)
-            self._go(l)
-            self.speed(0)
-            self._rotate(w)
-        self._rotate(-w2)
-        if speed == 0:
-            self.tracer(tr, dl)
-        self.speed(speed)
+            return
+        # nothing to animate: compute the vertices, turning and moving
+        # just like the steps above, and go along them at once
+        c, s = _rotation(w, self._degreesPerAU)
+        orient = self._orient.turn(*_rotation(w2, self._degreesPerAU))
+        position = self._position
+        points = []
+        for i in range(steps):
+            position = position.move(orient, l)
+            points.append(position)
+            orient = orient.turn(c, s)
+        self._orient = orient.turn(*_rotation(-w2, self._degreesPerAU))
+        self._gotomany(points)
+        tr = self.tracer()
+        if speed == 0 and tr != 1:
+            # show the circle even if the tracer is off, as drawing it
+            # with the tracer turned off and on again always did
+            self.tracer(tr, self.delay())
+
+    def _arcsteps(self, radius, extent):
+        """Return the number of steps of an arc of radius and extent
+        which look round enough."""
+        frac = abs(extent)/self._fullcircle 
+        return 1+int(min(11+abs(radius)/6.0, 59.0)*frac)
+
+    def _gotomany(self, points):
+        """Bewegt die Turtle der Reihe nach zu den Punkten points"""
+        for point in points:
+            self._goto(point)
+
+    def _animated(self):
+        """Return True if the moves of the turtle are animated"""
+        return False
 
 ## three dummy methods to be implemented by child class:
     
@@ -1961,18 +2565,19 @@ class _TurtleImage(object):
         screen = RawPen.screens[self.screenIndex]
         self.shapeIndex = shapeIndex
         if self._type in ["image", "polygon"]:
-            screen._delete(self._item)
+            screen._release(self._item)
         elif self._type == "compound":
             for item in self._item:
-                screen._delete(item)                
+                screen._release(item)                
         self._type = screen._shapes[shapeIndex]._type
         if self._type == "polygon":
-            self._item = screen._createpoly()
+            self._item = screen._newsprite()
         elif self._type == "image":
             self._item = screen._createimage(screen._shapes["blank"]._data)
         elif self._type == "compound":
-            self._item = [screen._createpoly() for item in
+            self._item = [screen._newsprite() for item in
                                           screen._shapes[shapeIndex]._data]
+            self._group = screen._newgroup(self._item)
 
                   
 class RawPen(TPen, TNavigator):
@@ -1983,26 +2588,50 @@ class RawPen(TPen, TNavigator):
     canvases = []
     screens = []    
     DEFAULT_MODE = "standard"
+    _RUNBATCH = 10000   # commands run computes and draws at once
+    _tags = 0           # number of pen tags handed out, see _newtag
         
     def __init__(self, canvas, shape = "arrow"): 
         if canvas not in RawPen.canvases:
             RawPen.canvases.append(canvas)
-            RawPen.screens.append(TurtleScreen(canvas))
+            RawPen.screens.append(_screenclass(canvas)(canvas))
         self.screenIndex = RawPen.canvases.index(canvas)
         TNavigator.__init__(self)
         TPen.__init__(self)
         screen = self.screens[self.screenIndex]
         screen._turtles.append(self)
-        self.drawingLineItem = screen._createline()
+        self.drawingLineItem = screen._newitem("line")
         self.turtle = _TurtleImage(self.screenIndex, shape)
         self._poly = None
         self._creatingPoly = False
         self._fillitem = self._fillpath = None
         self._hidden_from_screen = False
-        self.currentLineItem = screen._createline()
+        self._tag = self._newtag()
+        self.currentLineItem = screen._newitem("line")
         self.currentLine = [self._position]
-        self.items = [self.currentLineItem]
+        self.items = []
+        self._keep(self.currentLineItem)
+        screen._stackcount += 1
+        self._linestack = screen._stackcount
+        self._chunk = len(self.currentLine)
+        self._pending = None
+        self._dirty = False
+        self._drawnsprite = self._drawnline = None
+        self._drawnpose = self._spritepose = None
         self._update()
+
+    @classmethod
+    def _newtag(cls):
+        """Return a new tag for the items of a pen."""
+        RawPen._tags += 1
+        return "pen%d" % RawPen._tags
+
+    def _keep(self, item):
+        """Add item to the pen's drawing, which clear deletes."""
+        screen = self.screens[self.screenIndex]
+        self.items.append(item)
+        screen._tag(item, self._tag)
+        screen._owners[item] = self._tag
    
     def reset(self):
         """Delete the pen's drawing from the screen,
@@ -2032,32 +2661,42 @@ class RawPen(TPen, TNavigator):
     def _clear(self, n=None):
         """Delete all of pen's drawings"""
         screen = self.screens[self.screenIndex]
+        self._flush()
         items = self.items
         self._fillitem = self._fillpath = None
         #self._filling = False
+        screen._stackcount += 1
         if n == None:
-            for item in items:
-                screen._delete(item)
-            self.currentLineItem = screen._createline()
+            # the new line first, so the old one is no longer in use
+            # when it is released
+            self.currentLineItem = screen._newitem("line")
+            screen._releasetagged(items, self._tag)
+            self._drawnline = None
+            self._linestack = screen._stackcount
             self.currentLine = []
             if self._drawing:
                 self.currentLine.append(self._position)
-            self.items = [self.currentLineItem]
+            self._chunk = len(self.currentLine)
+            self.items = []
+            self._keep(self.currentLineItem)
         else:                                      
             if n > 0 and len(self.currentLine)<2:
                 n = n+1
             delete, stay = items[:-n], items[-n:]
             if n > 0:
                 delete, stay = stay, delete
-            for item in delete:
-                screen._delete(item)
             self.items = stay
-            if self.currentLineItem not in self.items:
-                self.currentLineItem = screen._createline()
+            if self.currentLineItem not in stay:
+                self.currentLineItem = screen._newitem("line")
+                self._drawnline = None
+                self._linestack = screen._stackcount
                 self.currentLine = []
                 if self._drawing:
                     self.currentLine.append(self._position)
-                self.items.append(self.currentLineItem)
+                self._chunk = len(self.currentLine)
+                self._keep(self.currentLineItem)
+            for item in delete:
+                screen._release(item)
 
     def clear(self, n=None):
         """Delete the pen's drawings from the screen.
@@ -2075,20 +2714,86 @@ class RawPen(TPen, TNavigator):
 
     def _update(self, count=True, forced=False):
         """Perform a TurtleScreen update.
+        As the pose and looks of a pen only change in methods which
+        end with its _update, only the pens updated since the last
+        drawing are drawn, unless forced or the scale changed.
         """
         screen = self.screens[self.screenIndex]
+        if not self._dirty:
+            self._dirty = True
+            screen._dirty.append(self)
         if count:
             screen._incrementudc()
         if forced or (screen._tracing != 0 and screen._updatecounter==0):
+            scale = (screen.xscale, screen.yscale)
+            if forced or scale != screen._drawnscale:
+                turtles = screen._turtles
+                screen._drawnscale = scale
+            else:
+                turtles = screen._dirty
+            screen._dirty = []
             # bnm rather than self._drawturtle() this seems to fix the problem of
             # turtles coming and going at odd times when tracer is set to values != 1
-            for t in screen._turtles:
+            for t in turtles:
+                t._dirty = False
+                if TurtleScreen._INSTANT and not forced:
+                    # remember what to draw, the line only grows until
+                    # _newLine or _clear, which flush it
+                    t._pending = (t._spritestate(), t.currentLineItem,
+                                  t.currentLine, len(t.currentLine),
+                                  t._pencolor, t._pensize)
+                    continue
+                t._pending = None
                 t._drawturtle()
-                if len(t.currentLine)>1:   
-                    screen._drawline(t.currentLineItem, t.currentLine,
-                                     t._pencolor, t._pensize)
+                t._drawcurrentline(t.currentLineItem, t.currentLine,
+                                   len(t.currentLine), t._pencolor,
+                                   t._pensize)
+            if forced or not TurtleScreen._INSTANT:
+                screen._raiseturtles()
+            if screen._updatecounter != 0 or screen._tracing <= 0:
+                # forced, the turtles were hidden, see _spritestate
+                screen._touch(screen._turtles)
         screen.update(forced)
 
+    def _drawcurrentline(self, item, line, n, color, size):
+        """Draw the first n points of line, the pen's current line,
+        unless they are on the canvas already. As the line only grows,
+        mostly just the points added since the last call are sent.
+        """
+        screen = self.screens[self.screenIndex]
+        if screen._owners.get(item) != self._tag:
+            # deleted or reused since, e.g. by clearing another pen
+            if item != self.currentLineItem:
+                return
+            item = self.currentLineItem = screen._newitem("line")
+            self._keep(item)
+            self._drawnline = None
+            screen._stackcount += 1
+            self._linestack = screen._stackcount
+        drawn = (item, id(line), n, color, size, screen.xscale, screen.yscale)
+        last = self._drawnline
+        if n < 2 or drawn == last:
+            return
+        if (last is not None and last[:2] == drawn[:2] and
+                last[3:] == drawn[3:] and last[2] < n):
+            screen._extendline(item, line[last[2]:n])
+        else:
+            screen._drawline(item, line[:n], color, size)
+        self._drawnline = drawn
+
+    def _flush(self):
+        """Draw the pens of the screen as they were at the last
+        update, which was deferred in instant mode.
+        """
+        screen = self.screens[self.screenIndex]
+        for t in screen._turtles:
+            if t._pending is not None:
+                state, item, line, n, color, size = t._pending
+                t._pending = None
+                t._drawturtle(state)
+                t._drawcurrentline(item, line, n, color, size)
+        screen._raiseturtles()
+
     def update(self):
         """Perform a TurtleScreen update.
         Especially useful to control screen updates
@@ -2126,11 +2831,12 @@ class RawPen(TPen, TNavigator):
         screen = self.screens[self.screenIndex]
         if flag is None:
             return screen._tracing
+        self._flush()
         if screen._tracing != 1:
             for t in screen._turtles:
-                if len(t.currentLine)>1:   
-                    screen._drawline(t.currentLineItem, t.currentLine,
-                                     t._pencolor, t._pensize)
+                t._drawcurrentline(t.currentLineItem, t.currentLine,
+                                   len(t.currentLine), t._pencolor,
+                                   t._pensize)
         screen.tracer(flag, delay)
         self._update(forced=True)
 
@@ -2148,16 +2854,26 @@ class RawPen(TPen, TNavigator):
         screen = self.getScreen()
         self._newLine(self._drawing)
         q = deepcopy(self)
+        q._pending = None
+        q._dirty = False
+        q._drawnsprite = q._drawnline = None
+        q._drawnpose = q._spritepose = None
+        screen._stackcount += 1
         screen._turtles.append(q)
         ttype = screen._shapes[self.turtle.shapeIndex]._type
         if ttype == "polygon":
-            q.turtle._item = screen._createpoly()
+            q.turtle._item = screen._newsprite()
         elif ttype == "image":
             q.turtle._item = screen._createimage(screen._shapes["blank"]._data)
         elif ttype == "compound":
-            q.turtle._item = [screen._createpoly() for item in
+            q.turtle._item = [screen._newsprite() for item in
                               screen._shapes[self.turtle.shapeIndex]._data]
-        q.currentLineItem = screen._createline()
+            q.turtle._group = screen._newgroup(q.turtle._item)
+        q._tag = q._newtag()
+        q.currentLineItem = screen._newitem("line")
+        q.items = []
+        q._keep(q.currentLineItem)
+        q._linestack = screen._stackcount
         q._update()
         return q
 
@@ -2181,57 +2897,112 @@ class RawPen(TPen, TNavigator):
             return self.turtle.shapeIndex
         if not name in self.getshapes():
             raise TG_Error("There is no shape named %s" % name)
+        self._flush()
         self.turtle._setshape(name)
+        self._drawnsprite = self._spritepose = None
+        self.screens[self.screenIndex]._stackcount += 1
         self._update()
 
-    def _polytrafo(self, poly):
+    def _polytrafo(self, poly, position=None, orient=None):
         """Computes transformed polygon shapes from a shape
         according to current position and heading.
         """
         xscale = self.screens[self.screenIndex].getXScale()
         yscale = self.screens[self.screenIndex].getYScale()
-        p0, p1 = self._position[0]*xscale, self._position[1]*yscale
-        e0, e1 = self._orient
+        if position is None:
+            position, orient = self._position, self._orient
+        p0, p1 = position[0]*xscale, position[1]*yscale
+        e0, e1 = orient
         return [(p0+e1*x+e0*y, p1-e0*x+e1*y) for (x, y) in poly]
 
-    def _drawturtle(self):
+    def _posed(self, polys, position, orient):
+        """Return the polygons polys, e.g. of Shape._scaled, turned
+        to heading orient and moved to position on the screen. The
+        result of the last call is reused if it is for the same
+        polygons and pose.
+        """
+        screen = self.screens[self.screenIndex]
+        xscale, yscale = screen.xscale, screen.yscale
+        pose = (polys, position, orient, xscale, yscale)
+        if self._drawnpose is not None and self._drawnpose[0] == pose:
+            return self._drawnpose[1]
+        p0, p1 = position[0]*xscale, position[1]*yscale
+        e0, e1 = orient
+        posed = [[(p0+e1*x+e0*y, p1-e0*x+e1*y) for (x, y) in poly]
+                 for poly in polys]
+        self._drawnpose = (pose, posed)
+        return posed
+
+    def _spritestate(self):
+        """Return the attributes _drawturtle draws the pen with,
+        which start with False if the pen is not to be shown.
+        """
+        screen = self.screens[self.screenIndex]
+        if self._shown and screen._updatecounter == 0 and screen._tracing > 0:
+            return (True, self._position, self._orient, self._resizemode,
+                    self._pensize, self._stretchfactor, self._outlinewidth,
+                    self._fillcolor, self._pencolor, screen.xscale,
+                    screen.yscale)
+        return (False,)
+
+    def _drawturtle(self, state=None):
+        """Draw the pen's shape according to state, see _spritestate,
+        unless it is drawn already. The shapes are put on top of the
+        drawing all at once, by TurtleScreen._raiseturtles.
+        """
         screen = self.screens[self.screenIndex]
         shape = screen._shapes[self.turtle.shapeIndex]
         ttype = shape._type
         titem = self.turtle._item
-        if self._shown and screen._updatecounter == 0 and screen._tracing > 0:
+        if state is None:
+            state = self._spritestate()
+        if state == self._drawnsprite:
+            return
+        self._drawnsprite = state
+        if state[0]:
+            (shown, position, orient, resizemode, pensize, stretchfactor,
+             outlinewidth, fillcolor, pencolor, xscale, yscale) = state
             self._hidden_from_screen = False
             tshape = shape._data
             if ttype == "polygon":
-                if self._resizemode == "noresize":
+                if resizemode == "noresize":
+                    l = 1
                     w = 1
-                    shape = tshape
-                else:
-                    if self._resizemode == "auto":
-                        l = max(1, self._pensize/5.0)
-                        w = self._pensize
-                    elif self._resizemode == "user":
-                        l = self._stretchfactor
-                        w = self._outlinewidth
-                    shape = [(l*x, l*y) for (x, y) in tshape]
-                shape = self._polytrafo(shape)
-                fc, oc = self._fillcolor, self._pencolor
-                screen._drawpoly(titem, shape, fill=fc, outline=oc,
-                                                      width=w, top=True,xform=False)
+                elif resizemode == "auto":
+                    l = max(1, pensize/5.0)
+                    w = pensize
+                elif resizemode == "user":
+                    l = stretchfactor
+                    w = outlinewidth
+                poly, = self._posed(shape._scaled(l), position, orient)
+                fc, oc = fillcolor, pencolor
+                screen._drawpoly(titem, poly, fill=fc, outline=oc,
+                                                      width=w, xform=False)
             elif ttype == "image":
                 xscale = self.screens[self.screenIndex].getXScale()
                 yscale = self.screens[self.screenIndex].getYScale()                
-                np = (self._position[0]*xscale, self._position[1]*yscale)
-                screen._drawimage(titem, np, tshape)
+                np = (position[0]*xscale, position[1]*yscale)
+                if not self._movesprite(titem, (titem, tshape), np):
+                    screen._drawimage(titem, np, tshape)
             elif ttype == "compound":
-                l = self._stretchfactor
-                w = self._outlinewidth
-                for item, (poly, fc, oc) in zip(titem, tshape):
-                    poly = [(l*x, l*y) for (x, y) in poly]
-                    poly = self._polytrafo(poly)
+                l = stretchfactor
+                w = outlinewidth
+                step = screen._spritestep
+                if step:
+                    polys = shape._turned(l, step, orient)
+                    p0, p1 = position[0]*xscale, position[1]*yscale
+                    if self._movesprite(self.turtle._group, (titem, polys, w),
+                                        (p0, p1)):
+                        return
+                    polys = [[(p0+x, p1+y) for (x, y) in poly]
+                             for poly in polys]
+                else:
+                    polys = self._posed(shape._scaled(l), position, orient)
+                for item, poly, (_, fc, oc) in zip(titem, polys, tshape):
                     screen._drawpoly(item, poly, fill=fc, outline=oc,
-                                                      width=w, top=True,xform=False)
+                                                      width=w, xform=False)
         else:
+            self._spritepose = None
             if self._hidden_from_screen:
                 return
             if ttype == "polygon":
@@ -2244,6 +3015,26 @@ class RawPen(TPen, TNavigator):
                     screen._drawpoly(item, ((0, 0), (0, 0), (0, 0)), "", "")
             self._hidden_from_screen = True
                 
+    def _movesprite(self, group, sprite, position):
+        """Move the shape items group to position on the screen, if the
+        sprite cache is on and they were drawn as sprite before, and
+        return True. Otherwise remember sprite and position as drawn
+        and return False, to have the shape drawn at position.
+        """
+        screen = self.screens[self.screenIndex]
+        last = self._spritepose
+        if not screen._spritestep:
+            self._spritepose = None
+            return False
+        self._spritepose = (sprite, position)
+        if last is None or last[0] != sprite:
+            return False
+        dx = position[0] - last[1][0]
+        dy = position[1] - last[1][1]
+        if dx or dy:
+            screen._move(group, dx, dy)
+        return True
+
     def _goto(self, end):
         """Move the pen to the point end, thereby drawing a line
         if pen is down. All other methodes for turtle movement depend
@@ -2251,7 +3042,7 @@ class RawPen(TPen, TNavigator):
         """
         screen = self.screens[self.screenIndex]
         start = self._position
-        if self._speed and screen._tracing == 1:
+        if self._speed and screen._tracing == 1 and not screen._INSTANT:
             diff = end-start
             nhops = 1+int(abs(diff)/(3*(1.1**self._speed)*self._speed))
             delta = diff * (1.0/nhops)
@@ -2260,8 +3051,11 @@ class RawPen(TPen, TNavigator):
                     top = True
                 else:
                     top = False
-                self._position = start + delta * n
+                self._position = start.move(delta, n)
                 if self._drawing:
+                    if top:
+                        # the line is put above the turtles
+                        screen._stackcount += 1
                     screen._drawline(self.drawingLineItem,
                                      (start, self._position),
                                      self._pencolor, self._pensize, top)
@@ -2272,6 +3066,7 @@ class RawPen(TPen, TNavigator):
         # Turtle now at end, 
         if self._drawing: # now update currentLine
             self.currentLine.append(end)
+            self._chunk += 1
         if isinstance(self._fillpath, list):
             self._fillpath.append(end)
         self._position = end
@@ -2280,24 +3075,135 @@ class RawPen(TPen, TNavigator):
             yscale = self.screens[self.screenIndex].getYScale()
             end = (end[0]*xscale,end[1]*yscale)
             self._poly.append(end)
-        if len(self.currentLine) > 42: # answer to the ultimate question
-                                       # of life, the universe and everything
+        if len(self.currentLine) > screen._LINESPLIT:
             self._newLine()
+        elif self._chunk > screen._LINECHUNK:
+            self._chunked()
+        self._update(count=True)
+
+    def _chunked(self):
+        """Start a new chunk of the current line, where cTurtle used to
+        start a new line item on top of the others. A new item is only
+        needed if something was put on top since the line's item was.
+        """
+        if self._linestack != self.screens[self.screenIndex]._stackcount:
+            self._newLine()
+        else:
+            self._chunk = 1
+
+    def _gotomany(self, points):
+        """Move the pen along points, as _goto does for each of them in
+        turn without animation, but with a single update at the end.
+        points is a list of pairs or a NumPy array of shape (n, 2). The
+        points are walked by index, so that only the pieces put on the
+        current line are copied, or converted to pairs.
+        """
+        screen = self.screens[self.screenIndex]
+        count = len(points)
+        if not count:
+            return
+        last = _vec(tuple(_pairs(points[-1:])[0]))
+        if isinstance(self._fillpath, list) or self._creatingPoly:
+            pairs = _pairs(points)
+            if isinstance(self._fillpath, list):
+                self._fillpath.extend(pairs)
+            if self._creatingPoly:
+                xscale = screen.getXScale()
+                yscale = screen.getYScale()
+                self._poly.extend([(x*xscale, y*yscale) for x, y in pairs])
+        if self._drawing:
+            split, chunk = screen._LINESPLIT, screen._LINECHUNK
+            start = 0
+            while start < count:
+                # points up to the next split of the line or its chunk
+                stop = start + min(split + 1 - len(self.currentLine),
+                                   chunk + 1 - self._chunk)
+                self.currentLine.extend(_pairs(points[start:stop]))
+                if stop > count:
+                    self._chunk += count - start
+                    break
+                self._chunk += stop - start
+                self._position = _vec(tuple(self.currentLine[-1]))
+                if len(self.currentLine) > split:
+                    self._newLine()
+                else:
+                    self._chunked()
+                start = stop
+        self._position = last
         self._update(count=True)
 
+    def run(self, commands):
+        """Carry out the commands of an iterable, e.g. a list or a
+        generator, one after the other.
+        A command is the name of a pen method and its arguments as a
+        tuple, or the name alone. Commands are taken from the iterable
+        only as needed: moves, turns, penup and pendown are collected
+        into programs of up to 10000 commands, which are computed and
+        drawn at once (see Program), so even endless streams are drawn
+        in constant memory.
+        ---
+        Argument: an iterable of commands
+
+        call: run(<iterable>)
+
+        Example (for a Pen instance named turtle):
+        >>> turtle.run([("fd", 100), ("lt", 90), "pu", ("fd", 50)])
+        >>> turtle.pos()
+        (100.00,50.00)
+        """
+        from .program import Program, COMMANDS
+        program = Program()
+        record = dict([(name, getattr(program, name)) for name in COMMANDS])
+        recorded = 0
+        for command in commands:
+            if isinstance(command, str):
+                name, args = command, ()
+            else:
+                name, args = command[0], command[1:]
+            recorder = record.get(name)
+            if recorder is not None:
+                recorder(*args)
+                recorded += 1
+                if recorded >= self._RUNBATCH:
+                    program.run(self)
+                    program.clear()
+                    recorded = 0
+            else:
+                if recorded:
+                    program.run(self)
+                    program.clear()
+                    recorded = 0
+                getattr(self, name)(*args)
+        if recorded:
+            program.run(self)
+
+    def _arcsteps(self, radius, extent):
+        """Return the number of steps of an arc of radius and extent,
+        which depends on the radius on the screen."""
+        screen = self.screens[self.screenIndex]
+        scale = max(abs(screen.getXScale()), abs(screen.getYScale()))
+        return TNavigator._arcsteps(self, radius * scale, extent)
+
+    def _animated(self):
+        """Return True if the moves of the pen are animated"""
+        screen = self.screens[self.screenIndex]
+        return (self._speed > 0 and screen._tracing == 1 and
+                not screen._INSTANT)
+
     def _rotate(self, angle):
         """Turns pen clockwise by angle.
         """
         screen = self.screens[self.screenIndex]
+        c, s = _rotation(angle, self._degreesPerAU)
+        neworient = self._orient.turn(c, s)
         angle *= self._degreesPerAU
-        neworient = self._orient.rotate(angle)
         tracing = screen._tracing
-        if tracing == 1 and self._speed > 0:
+        if tracing == 1 and self._speed > 0 and not screen._INSTANT:
             anglevel = 3.0 * self._speed
             steps = 1 + int(abs(angle)/anglevel) 
-            delta = 1.0*angle/steps
+            c, s = _rotation(1.0*angle/steps)
             for i in range(steps):
-                self._orient = self._orient.rotate(delta)
+                self._orient = self._orient.turn(c, s)
                 self._update()
         self._orient = neworient
         self._update()
@@ -2308,16 +3214,22 @@ class RawPen(TPen, TNavigator):
            performance (via _drawline) slows down considerably.
         """
         screen = self.screens[self.screenIndex]
+        self._flush()
+        screen._stackcount += 1
         if len(self.currentLine) > 1:
-            screen._drawline(self.currentLineItem, self.currentLine,
-                                      self._pencolor, self._pensize)
-            self.currentLineItem = screen._createline()
-            self.items.append(self.currentLineItem)
+            self._drawcurrentline(self.currentLineItem, self.currentLine,
+                                  len(self.currentLine), self._pencolor,
+                                  self._pensize)
+            self.currentLineItem = screen._newitem("line")
+            self._drawnline = None
+            self._keep(self.currentLineItem)
         else:
             screen._drawline(self.currentLineItem, top=True)
+        self._linestack = screen._stackcount
         self.currentLine = []
         if usePos:
             self.currentLine = [self._position]
+        self._chunk = len(self.currentLine)
         
     def fill(self, flag):
         """ Call fill(True) before drawing the shape you want to fill,
@@ -2338,13 +3250,15 @@ class RawPen(TPen, TNavigator):
         """
         checkargs("boolean")
         screen = self.screens[self.screenIndex]
+        self._flush()
         if isinstance(self._fillpath, list):
             if len(self._fillpath) > 2:
                 screen._drawpoly(self._fillitem, self._fillpath,
                                                    fill=self._fillcolor) 
         if flag:
-            self._fillitem = screen._createpoly()
-            self.items.append(self._fillitem)
+            screen._stackcount += 1
+            self._fillitem = screen._newitem("poly")
+            self._keep(self._fillitem)
             self._fillpath = [self._position]
             self._newLine()
         else:
@@ -2411,11 +3325,13 @@ class RawPen(TPen, TNavigator):
         self.forward(0)
         self.pen(pen)
 
-    def _write(self, txt, align, font):
+    def _write(self, txt, align, font, move=True):
         screen = self.screens[self.screenIndex]
+        self._flush()
+        screen._stackcount += 1
         item, end = screen._write(self._position, txt, align, font,
-                                                         self._pencolor)
-        self.items.append(item)
+                                  self._pencolor, move)
+        self._keep(item)
         return end
 
     def write(self, arg, move=False, align="left",
@@ -2431,7 +3347,7 @@ class RawPen(TPen, TNavigator):
         >>> turtle.write('Home = (0, 0)', True, align="center")
         """
         checkargs( True, "boolean", ["right", "left", "center"], "font")
-        end = self._write(str(arg), align.lower(), font)
+        end = self._write(str(arg), align.lower(), font, move)
         if move:
             x, y = self.pos()
             self.setpos(end, y)
@@ -2477,6 +3393,9 @@ class RawPen(TPen, TNavigator):
         >>> cv
         <cTurtle.ScrolledCanvas instance at 0x010742D8>
         """
+        # draw what instant mode deferred, so the canvas is complete
+        self._flush()
+        self.getScreen()._flushcommands()
         return self.canvases[self.screenIndex]
     
     def getScreen(self):
@@ -2582,6 +3501,36 @@ class RawPen(TPen, TNavigator):
         """
         return self.getScreen().colormode(cmode)
     
+    def poolsize(self, size=None):
+        """ Return or set the number of deleted line and polygon
+        items which are kept hidden for reuse.
+        Screen oriented method, i.e. affects all Pens on the Screen.
+
+        Argument: None or number >= 0.
+
+        Example (for a Pen instance named turtle):
+        >>> turtle.poolsize(100)
+        >>> turtle.poolsize()
+        100
+        """
+        return self.getScreen().poolsize(size)
+
+    def spritecache(self, step=None):
+        """ Return or set the heading step in degrees of the sprite
+        cache, which draws turtles of compound shapes at headings
+        rounded to multiples of step, and moves turtles which only
+        changed their position. 0 turns the cache off.
+        Screen oriented method, i.e. affects all Pens on the Screen.
+
+        Argument: None or number >= 0.
+
+        Example (for a Pen instance named turtle):
+        >>> turtle.spritecache(5)
+        >>> turtle.spritecache()
+        5
+        """
+        return self.getScreen().spritecache(step)
+
     def delay(self, delay=None):
         """ Return or set the drawing delay in milliseconds.
         Screen oriented method, i.e. affects all Pens on the Screen.
@@ -2768,10 +3717,101 @@ _CANVHEIGHT = 600
 _LEFTRIGHT = -20
 _TOPBOTTOM = -50
 
+###  Rendering backends  ##################
+
+## A backend is a TurtleScreen subclass, which reimplements the
+## TurtleScreenBase primitives for some other graphics toolkit,
+## together with the canvas class it draws upon.  Pen creates
+## its canvas from the backend selected when the first Pen is
+## made, RawPen picks the screen class matching a given canvas.
+
+_backends = {}
+_backend = "tk"
+
+def registerBackend(name, screenclass, canvasclass=None):
+    """Register a rendering backend under name.
+
+    screenclass must be a TurtleScreen subclass overriding the
+    TurtleScreenBase primitives. canvasclass is the class of the
+    canvas it draws on; it is called as
+        canvasclass(width=..., height=..., canvwidth=..., canvheight=...)
+    when a Pen needs a new canvas. Canvases used with turtlecapture
+    should provide update() and postscript(file=..., colormode=...).
+    If canvasclass is None the backend draws on Tkinter canvases.
+    """
+    if not (isinstance(screenclass, type) and
+            issubclass(screenclass, TurtleScreen)):
+        raise TG_Error("backend %s is not a TurtleScreen" % name)
+    _backends[name] = (screenclass, canvasclass)
+
+def setBackend(name):
+    """Select the rendering backend used by subsequently created Pens.
+
+    Backends not registered yet are looked up as a module of this
+    package or as a top level module named name, which is expected
+    to register itself on import.
+    The backend can not be changed while the default Pen's
+    canvas exists.
+
+    Example:
+    >>> setBackend("tk")
+    """
+    global _backend
+    reason = ""
+    if name not in _backends:
+        for modname in ("%s.%s" % (__package__, name), name):
+            if modname.startswith("."):
+                continue
+            try:
+                __import__(modname)
+            except ImportError as e:
+                if e.name != modname:   # the backend's own imports failed
+                    reason = " (%s)" % e
+                continue
+            if name in _backends:
+                break
+    if name not in _backends:
+        raise TG_Error("There is no backend named %s%s" % (name, reason))
+    if _canvas is not None and name != _backend:
+        raise TG_Error("Cannot change backend while a canvas exists")
+    _backend = name
+
+def getBackend():
+    """Return the name of the selected rendering backend.
+
+    Example:
+    >>> getBackend()
+    'tk'
+    """
+    return _backend
+
+def _screenclass(canvas):
+    """Return the TurtleScreen class drawing on canvas, that of the
+    backend with the most derived canvas class canvas is one of."""
+    found = None
+    for screenclass, canvasclass in _backends.values():
+        if canvasclass is not None and isinstance(canvas, canvasclass):
+            if found is None or issubclass(canvasclass, found[1]):
+                found = screenclass, canvasclass
+    if found is None:
+        return TurtleScreen
+    return found[0]
+
+registerBackend("tk", TurtleScreen)
+
+
 class Pen(RawPen):
 
     def __init__(self, turtleshape="arrow"):  
         global _root, _canvas
+        screenclass, canvasclass = _backends[_backend]
+        if canvasclass is not None:
+            if _canvas is None:
+                _canvas = canvasclass(width=_WIDTH, height=_HEIGHT,
+                                      canvwidth = _CANVWIDTH,
+                                      canvheight = _CANVHEIGHT)
+            RawPen.__init__(self, _canvas, shape=turtleshape)
+            return
         if _root is None:
             _root = TK.Tk()
             _root.title(_title)
@@ -2803,6 +3843,8 @@ class Pen(RawPen):
             ### 10 pixels from the left screen-edge and
             ### 10 pixels from the upper screen-edge.
         """
+        if _root is None:   # canvas without a window
+            return
         _root.geometry("%dx%d%+d%+d"%(w, h, lr, tb))
 
     def setup(self, width=0.5, height=0.75, startx=None, starty=None):
@@ -2828,6 +3870,8 @@ class Pen(RawPen):
 
         sets window to 75% of screen by 50% of screen and centers
         """
+        if _root is None:
+            return
         sw = _root.winfo_screenwidth()
         sh = _root.winfo_screenheight()
         if isinstance(width, float) and 0 <= width <= 1:
@@ -2844,12 +3888,13 @@ class Pen(RawPen):
     def _destroy(self):
         global _root, _canvas, _pen
         screen = self.screens[self.screenIndex]        
-        root = screen.cv._root
+        root = getattr(screen.cv, "_root", None)
         if root is _root:
             _pen = None
             _root = None
             _canvas = None
-        root.destroy()
+        if root is not None:
+            root.destroy()
 
     def bye(self):
         """Shut the turtlegraphics window.
@@ -2881,6 +3926,27 @@ def _getpen():
         _pen = Pen()
     return _pen
 
+def _flushall():
+    """Draw what instant mode deferred on all screens."""
+    for screen in RawPen.screens:
+        if screen._turtles:
+            screen._turtles[0]._flush()
+        screen._flushcommands()
+
+def _destroyall():
+    """Destroy the default window and forget all screens,
+    so the next Pen starts on a fresh canvas."""
+    global _root, _canvas, _pen
+    if _root is not None:
+        try:
+            _root.destroy()
+        except TK.TclError:
+            pass
+    _root = _canvas = _pen = None
+    del RawPen.canvases[:]
+    del RawPen.screens[:]
+    TurtleScreen._RUNNING = True
+
 def getmethparlist(ob):
     "Get strings describing the arguments for the given object"
     argText1 = argText2 = ""
@@ -2943,8 +4009,18 @@ for _cls in TNavigator, TPen, RawPen, Pen:
         exec(defstr)
         eval(_key).__doc__ = _docrevision(_cls.__dict__[_key].__doc__)
 
-mainloop = TK.mainloop
+def mainloop(n=0):
+    """Run the Tkinter event loop, see Tkinter.mainloop. Returns
+    immediately for backends without a display.
+    """
+    if _backends[_backend][1] is None:
+        _flushall()
+        TK.mainloop(n)
+
 del pl1, pl2, defstr
+
+if os.getenv("TURTLEBACKEND"):
+    setBackend(os.getenv("TURTLEBACKEND"))
     
 if __name__ == "__main__":
     def demo1():
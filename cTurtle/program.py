@@ -0,0 +1,219 @@
+"""Recorded turtle programs for cTurtle.
+
+A Program records moves, turns and pen ups and downs instead of
+carrying them out. Running it computes all positions at once: the
+heading after every command is the cumulative sum of the turns, and
+the position the cumulative sum of the moves along those headings.
+The lines are then drawn with one batch of points per pen down:
+
+>>> program = Program()
+>>> for i in range(100000):
+...     program.fd(i % 7)
+...     program.lt(89)
+>>> program.run(turtle)
+
+This pays off for long sequences of moves, as made by fractals and
+spirals, where calling the turtle for each move costs most of the
+time. The positions are computed with NumPy if it is installed, and
+by a plain loop otherwise. A pen whose moves are animated carries out
+the commands one by one, as if they had not been recorded.
+
+RawPen.run consumes commands from any iterable, recording them into
+programs of limited length, so generated command streams are drawn
+in constant memory. lsystem generates the commands of an L-system
+that way, without expanding its string:
+
+>>> turtle.run(lsystem("F", {"F": "F+F--F+F"}, 6,
+...                    {"F": ("fd", 1), "+": ("lt", 60), "-": ("rt", 60)}))
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .cTurtle import _vec, _rotation, _getpen
+
+
+_MOVE, _TURN, _UP, _DOWN = range(4)
+
+# the pen methods a Program can record
+COMMANDS = frozenset(["forward", "fd", "back", "bk", "backward", "left",
+                      "lt", "right", "rt", "penup", "pu", "up", "pendown",
+                      "pd", "down"])
+
+
+class Program(object):
+    """A sequence of forward, back, left, right, penup and pendown
+    commands, which can be run by any pen.
+    """
+    def __init__(self):
+        self._kinds = []
+        self._values = []
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def clear(self):
+        """Forget the recorded commands."""
+        del self._kinds[:]
+        del self._values[:]
+
+    def forward(self, distance):
+        """Record a move forward by distance."""
+        self._kinds.append(_MOVE)
+        self._values.append(distance)
+
+    def back(self, distance):
+        """Record a move backward by distance."""
+        self._kinds.append(_MOVE)
+        self._values.append(-distance)
+
+    def left(self, angle):
+        """Record a turn left by angle, in the angle unit of the pen
+        running the program."""
+        self._kinds.append(_TURN)
+        self._values.append(angle)
+
+    def right(self, angle):
+        """Record a turn right by angle, in the angle unit of the pen
+        running the program."""
+        self._kinds.append(_TURN)
+        self._values.append(-angle)
+
+    def penup(self):
+        """Record pulling the pen up."""
+        self._kinds.append(_UP)
+        self._values.append(0)
+
+    def pendown(self):
+        """Record pulling the pen down."""
+        self._kinds.append(_DOWN)
+        self._values.append(0)
+
+    fd = forward
+    bk = back
+    backward = back
+    lt = left
+    rt = right
+    pu = penup
+    up = penup
+    pd = pendown
+    down = pendown
+
+    def run(self, pen=None):
+        """Carry out the program with pen, by default the anonymous
+        pen of the module functions. The program is kept and can be
+        run again.
+        """
+        if pen is None:
+            pen = _getpen()
+        if pen._animated():
+            self._replay(pen)
+            return
+        if np is not None:
+            points, orient, toggles = self._evaluate(pen)
+        else:
+            points, orient, toggles = self._walk(pen)
+        pen._orient = orient
+        start = 0
+        for moves, kind in toggles:
+            pen._gotomany(points[start:moves])
+            if kind == _UP:
+                pen.penup()
+            else:
+                pen.pendown()
+            start = moves
+        if start < len(points):
+            pen._gotomany(points[start:])
+        else:
+            pen._update()
+
+    def _replay(self, pen):
+        """Carry out the commands one by one."""
+        commands = {_MOVE: pen.forward, _TURN: pen.left,
+                    _UP: lambda value: pen.penup(),
+                    _DOWN: lambda value: pen.pendown()}
+        for kind, value in zip(self._kinds, self._values):
+            commands[kind](value)
+
+    def _walk(self, pen):
+        """Return the positions the moves lead to, the final orientation
+        of pen and the pen ups and downs as pairs of the number of
+        moves before them and their kind, computed like the pen does,
+        one command at a time."""
+        degreesPerAU = pen._degreesPerAU
+        position, orient = pen._position, pen._orient
+        points = []
+        toggles = []
+        for kind, value in zip(self._kinds, self._values):
+            if kind == _MOVE:
+                position = position.move(orient, value)
+                points.append(position)
+            elif kind == _TURN:
+                orient = orient.turn(*_rotation(value, degreesPerAU))
+            else:
+                toggles.append((len(points), kind))
+        return points, orient, toggles
+
+    def _evaluate(self, pen):
+        """Return the same as _walk, computed with cumulative sums,
+        with the positions as a NumPy array of shape (n, 2)."""
+        if not self._kinds:
+            return [], pen._orient, []
+        kinds = np.array(self._kinds, dtype=np.int8)
+        values = np.array(self._values, dtype=float)
+        degrees = np.cumsum(np.where(kinds == _TURN, values, 0.0))
+        degrees *= pen._degreesPerAU
+        # the heading is exact where it turned by multiples of 90 degrees
+        c = np.cos(degrees * (math.pi / 180.0))
+        s = np.sin(degrees * (math.pi / 180.0))
+        right = degrees % 90 == 0
+        quarter = (degrees[right] // 90).astype(int) % 4
+        c[right] = np.array([1.0, 0.0, -1.0, 0.0])[quarter]
+        s[right] = np.array([0.0, 1.0, 0.0, -1.0])[quarter]
+        ox, oy = pen._orient
+        orient = _vec((ox*c[-1] - oy*s[-1], oy*c[-1] + ox*s[-1]))
+        x0, y0 = pen._position
+        moved = kinds == _MOVE
+        distance = values[moved]
+        c, s = c[moved], s[moved]
+        x = x0 + np.cumsum(distance * (ox*c - oy*s))
+        y = y0 + np.cumsum(distance * (oy*c + ox*s))
+        # drawn from the array one chunk at a time, see RawPen._gotomany
+        points = np.column_stack((x, y))
+        toggled = np.flatnonzero(kinds >= _UP)
+        moves = np.cumsum(moved)[toggled]
+        toggles = list(zip(moves.tolist(), kinds[toggled].tolist()))
+        return points, orient, toggles
+
+
+def lsystem(axiom, rules, depth, actions):
+    """Generate the commands of the L-system with axiom and rules,
+    expanded depth times, for RawPen.run.
+
+    rules maps symbols to the strings they are replaced with, actions
+    maps symbols to the commands they stand for, e.g. ("fd", 10).
+    Symbols without an action draw nothing. The expansion is generated
+    symbol by symbol, so its memory grows with depth, not with the
+    length of the expanded string.
+
+    Example:
+    >>> dragon = lsystem("FX", {"X": "X+YF+", "Y": "-FX-Y"}, 12,
+    ...                  {"F": ("fd", 3), "+": ("rt", 90), "-": ("lt", 90)})
+    >>> turtle.run(dragon)
+    """
+    stack = [(iter(axiom), depth)]
+    while stack:
+        symbols, level = stack[-1]
+        for symbol in symbols:
+            if level and symbol in rules:
+                stack.append((iter(rules[symbol]), level - 1))
+                break
+            action = actions.get(symbol)
+            if action is not None:
+                yield action
+        else:
+            stack.pop()
@@ -0,0 +1,426 @@
+"""NumPy raster backend for cTurtle.
+
+The raster backend records the drawing like the recording backend
+and rasterizes the display list into a NumPy RGB array, so the
+final image is available without a display, canvas.postscript or
+ImageMagick:
+
+>>> setBackend("raster")
+>>> fd(100)
+>>> getCanvas().image().shape
+(600, 800, 3)
+
+Lines are drawn with their width and round caps and joins, like
+the line items created by TurtleScreenBase._createline, polygons
+are filled with the even-odd rule, text is drawn with a built in
+5x7 pixel font and gif images are decoded by a small gif reader.
+rasterize() renders the display list of any RecordingCanvas.
+
+Select it with the environment variable TURTLEBACKEND=raster
+or by calling setBackend("raster") before creating a Pen.
+Requires NumPy.
+
+When the environment variable TURTLEIMAGECACHE names a directory,
+decoded gif-files are kept there, so other processes drawing the
+same images load their pixels instead of decoding them again.
+"""
+
+import hashlib
+import math
+import os
+import struct
+
+import numpy as np
+
+from .cTurtle import TG_Error, registerBackend
+from .colors import torgb
+from .recording import RecordingCanvas, RecordingImage, RecordingScreen, \
+     _fontsize
+
+
+## 5x7 font for the characters " " to "~": five columns per glyph,
+## bit 0 is the top row.
+_FONT = bytes.fromhex(
+    "0000000000" "00005f0000" "0007000700" "147f147f14" "242a7f2a12"
+    "2313086462" "3649562050" "0000070000" "001c224100" "0041221c00"
+    "14083e0814" "08083e0808" "0050300000" "0808080808" "0060600000"
+    "2010080402" "3e5149453e" "00427f4000" "4261514946" "2141454b31"
+    "1814127f10" "2745454539" "3c4a494930" "0171090503" "3649494936"
+    "064949291e" "0036360000" "0056360000" "0814224100" "1414141414"
+    "0041221408" "0201510906" "3249794132" "7e1111117e" "7f49494936"
+    "3e41414122" "7f4141221c" "7f49494941" "7f09090901" "3e4149497a"
+    "7f0808087f" "00417f4100" "2040413f01" "7f08142241" "7f40404040"
+    "7f020c027f" "7f0408107f" "3e4141413e" "7f09090906" "3e4151215e"
+    "7f09192946" "4649494931" "01017f0101" "3f4040403f" "1f2040201f"
+    "3f4038403f" "6314081463" "0708700807" "6151494543" "007f414100"
+    "0204081020" "0041417f00" "0402010204" "4040404040" "0001020400"
+    "2054545478" "7f48444438" "3844444420" "384444487f" "3854545418"
+    "087e090102" "0c5252523e" "7f08040478" "00447d4000" "2040443d00"
+    "7f10284400" "00417f4000" "7c04180478" "7c08040478" "3844444438"
+    "7c14141408" "081414187c" "7c08040408" "4854545420" "043f444020"
+    "3c4040207c" "1c2040201c" "3c4030403c" "4428102844" "0c5050503c"
+    "4464544c44" "0008364100" "00007f0000" "0041360800" "1008081008")
+
+_glyphs = {}
+
+def _glyph(ch):
+    """Return the 8x6 boolean cell of character ch."""
+    cell = _glyphs.get(ch)
+    if cell is None:
+        code = ord(ch) - 32
+        if not 0 <= code < 95:
+            code = ord("?") - 32
+        cols = np.frombuffer(_FONT[5*code:5*code+5], dtype=np.uint8)
+        cell = np.zeros((8, 6), dtype=bool)
+        cell[:7, :5] = (cols[None, :] >> np.arange(7)[:, None]) & 1
+        _glyphs[ch] = cell
+    return cell
+
+def _fontscale(font):
+    return max(1, int(round(_fontsize(font) / 8.0)))
+
+
+def _lzwdecode(data, minsize):
+    """Decode the LZW compressed image data of a gif-file."""
+    clear = 1 << minsize
+    end = clear + 1
+    data = bytes(data) + b"\0\0\0"
+    nbits = (len(data) - 3) * 8
+    table = [bytes((i,)) for i in range(clear)] + [b"", b""]
+    size = minsize + 1
+    out = bytearray()
+    prev = None
+    bitpos = 0
+    while bitpos + size <= nbits:
+        i = bitpos >> 3
+        code = ((data[i] | data[i+1] << 8 | data[i+2] << 16) >>
+                (bitpos & 7)) & ((1 << size) - 1)
+        bitpos += size
+        if code == clear:
+            del table[clear+2:]
+            size = minsize + 1
+            prev = None
+            continue
+        if code == end:
+            break
+        if code < len(table):
+            entry = table[code]
+            if prev is not None:
+                table.append(prev + entry[:1])
+        elif code == len(table) and prev is not None:
+            entry = prev + prev[:1]
+            table.append(entry)
+        else:
+            raise TG_Error("corrupt gif data")
+        out += entry
+        prev = entry
+        if len(table) == 1 << size and size < 12:
+            size += 1
+    return out
+
+def _readgif(filename):
+    """Return the first frame of a gif-file as an array of rgb
+    values and an array marking the opaque pixels."""
+    with open(filename, "rb") as f:
+        data = f.read()
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise TG_Error("%s is not a gif-file" % filename)
+    width, height, flags = struct.unpack("<HHB", data[6:11])
+    pos = 13
+    colortable = None
+    if flags & 0x80:
+        n = 3 << ((flags & 7) + 1)
+        colortable = data[pos:pos+n]
+        pos += n
+    transparent = None
+    while pos < len(data):
+        block = data[pos]
+        pos += 1
+        if block == 0x21:                                  # extension
+            label = data[pos]
+            pos += 1
+            if label == 0xf9 and data[pos] >= 4 and data[pos+1] & 1:
+                transparent = data[pos+4]
+            while data[pos]:
+                pos += data[pos] + 1
+            pos += 1
+        elif block == 0x2c:                                # image
+            x, y, w, h, iflags = struct.unpack("<HHHHB", data[pos:pos+9])
+            pos += 9
+            if iflags & 0x80:
+                n = 3 << ((iflags & 7) + 1)
+                colortable = data[pos:pos+n]
+                pos += n
+            minsize = data[pos]
+            pos += 1
+            chunks = []
+            while data[pos]:
+                chunks.append(data[pos+1:pos+1+data[pos]])
+                pos += data[pos] + 1
+            pixels = _lzwdecode(b"".join(chunks), minsize)
+            pixels = pixels[:w*h].ljust(w*h, b"\0")
+            index = np.frombuffer(bytes(pixels), dtype=np.uint8).reshape(h, w)
+            if iflags & 0x40:
+                rows = np.concatenate([np.arange(0, h, 8), np.arange(4, h, 8),
+                                       np.arange(2, h, 4), np.arange(1, h, 2)])
+                deinterlaced = np.empty_like(index)
+                deinterlaced[rows] = index
+                index = deinterlaced
+            palette = np.zeros((256, 3), dtype=np.uint8)
+            if colortable:
+                table = np.frombuffer(colortable, dtype=np.uint8).reshape(-1, 3)
+                palette[:len(table)] = table
+            rgb = np.zeros((height, width, 3), dtype=np.uint8)
+            opaque = np.zeros((height, width), dtype=bool)
+            w, h = min(w, width - x), min(h, height - y)
+            rgb[y:y+h, x:x+w] = palette[index[:h, :w]]
+            opaque[y:y+h, x:x+w] = True
+            if transparent is not None:
+                opaque[y:y+h, x:x+w] = index[:h, :w] != transparent
+            return rgb, opaque
+        elif block == 0x3b:                                # trailer
+            break
+        else:
+            raise TG_Error("corrupt gif-file %s" % filename)
+    raise TG_Error("gif-file %s contains no image" % filename)
+
+
+def _decodegif(filename):
+    """Return the rgb and opaque arrays of the gif-file filename, from
+    the directory TURTLEIMAGECACHE if it holds them already for the
+    file as it is now, or decoded by _readgif and stored there."""
+    directory = os.environ.get("TURTLEIMAGECACHE")
+    if not directory:
+        return _readgif(filename)
+    stat = os.stat(filename)
+    key = "%s %d %d" % (os.path.abspath(filename), stat.st_mtime_ns,
+                        stat.st_size)
+    path = os.path.join(directory,
+                        hashlib.sha1(key.encode()).hexdigest() + ".npz")
+    try:
+        with np.load(path) as cached:
+            return cached["rgb"], cached["opaque"]
+    except (OSError, ValueError, KeyError):
+        pass
+    rgb, opaque = _readgif(filename)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temporary = "%s.%d.tmp" % (path, os.getpid())
+        with open(temporary, "wb") as f:
+            np.savez(f, rgb=rgb, opaque=opaque)
+        os.replace(temporary, path)
+    except OSError:
+        pass
+    return rgb, opaque
+
+
+class RasterImage(RecordingImage):
+    """Image object of the raster backend: additionally holds
+    the decoded pixels of the gif-file.
+    """
+    def __init__(self, filename=None):
+        RecordingImage.__init__(self, filename)
+        self.pixels = self.opaque = None
+        if filename is not None:
+            self.pixels, self.opaque = _decodegif(filename)
+
+
+# pixels of the bounding boxes of line segments _stroke checks at once
+_STROKEPIXELS = 1 << 20
+
+
+def _imagepixels(image):
+    """Return rgb and opaque arrays of image or None."""
+    if not image:
+        return None
+    if getattr(image, "pixels", None) is None:
+        if getattr(image, "filename", None) is None:
+            return None
+        image.pixels, image.opaque = _decodegif(image.filename)
+    return image.pixels, image.opaque
+
+
+def _stroke(img, points, rgb, width):
+    """Draw the polyline points (an n x 2 array of pixel coordinates)
+    with given width and round caps and joins into img. The segments
+    are drawn together, as the pixels of their bounding boxes within
+    distance width/2 of them, up to _STROKEPIXELS pixels at a time."""
+    r = max(width, 1) / 2.0 + 0.25
+    r2 = r * r
+    h, w = img.shape[:2]
+    if len(points) == 1:
+        points = np.vstack([points, points])
+    a, b = points[:-1], points[1:]
+    lo = np.floor(np.minimum(a, b) - r)
+    hi = np.ceil(np.maximum(a, b) + r) + 1
+    j0 = np.clip(lo[:, 0], 0, w).astype(np.intp)
+    i0 = np.clip(lo[:, 1], 0, h).astype(np.intp)
+    j1 = np.clip(hi[:, 0], 0, w).astype(np.intp)
+    i1 = np.clip(hi[:, 1], 0, h).astype(np.intp)
+    bw = np.maximum(j1 - j0, 0)
+    sizes = np.maximum(i1 - i0, 0) * bw
+    drawn = np.flatnonzero(sizes)
+    if not len(drawn):
+        return
+    a, b, i0, j0, bw, sizes = (a[drawn], b[drawn], i0[drawn], j0[drawn],
+                               bw[drawn], sizes[drawn])
+    ends = np.cumsum(sizes)
+    start = 0
+    while start < len(sizes):
+        # the segments whose pixels are done in this pass, at least one
+        base = ends[start] - sizes[start]
+        stop = max(int(np.searchsorted(ends, base + _STROKEPIXELS,
+                                       side="right")), start + 1)
+        counts = sizes[start:stop]
+        seg = np.repeat(np.arange(stop - start), counts)
+        local = (np.arange(ends[stop-1] - base) -
+                 np.repeat(ends[start:stop] - counts - base, counts))
+        span = bw[start:stop][seg]
+        rows = i0[start:stop][seg] + local // span
+        cols = j0[start:stop][seg] + local % span
+        ax, ay = a[start:stop][seg].T
+        bx, by = b[start:stop][seg].T
+        py = rows + (0.5 - ay)
+        px = cols + (0.5 - ax)
+        dx, dy = bx - ax, by - ay
+        l2 = dx*dx + dy*dy
+        # a segment of length 0 is a dot: t is 0
+        t = np.clip((px*dx + py*dy) / np.where(l2 > 0, l2, 1.0), 0.0, 1.0)
+        d2 = (px - t*dx)**2 + (py - t*dy)**2
+        inside = d2 <= r2
+        img[rows[inside], cols[inside]] = rgb
+        start = stop
+
+def _fillpoly(img, points, rgb):
+    """Fill the polygon points (an n x 2 array of pixel coordinates)
+    using the even-odd rule."""
+    h, w = img.shape[:2]
+    i0 = max(int(math.floor(points[:, 1].min())), 0)
+    i1 = min(int(math.ceil(points[:, 1].max())) + 1, h)
+    j0 = max(int(math.floor(points[:, 0].min())), 0)
+    j1 = min(int(math.ceil(points[:, 0].max())) + 1, w)
+    if i0 >= i1 or j0 >= j1:
+        return
+    py = np.arange(i0, i1) + 0.5
+    px = np.arange(j0, j1) + 0.5
+    inside = np.zeros((i1 - i0, j1 - j0), dtype=bool)
+    for (ax, ay), (bx, by) in zip(points.tolist(),
+                                  np.roll(points, -1, axis=0).tolist()):
+        if ay == by:
+            continue
+        rows = (py >= min(ay, by)) & (py < max(ay, by))
+        if not rows.any():
+            continue
+        xcross = ax + (py[rows] - ay) * (bx - ax) / (by - ay)
+        inside[rows] ^= px[None, :] < xcross[:, None]
+    img[i0:i1, j0:j1][inside] = rgb
+
+def _text(img, x, y, txt, font, anchor, rgb):
+    """Draw txt with the built in font, anchored at pixel (x, y)."""
+    if not txt:
+        return
+    scale = _fontscale(font)
+    cells = np.hstack([_glyph(ch) for ch in txt])
+    if scale > 1:
+        cells = cells.repeat(scale, axis=0).repeat(scale, axis=1)
+    th, tw = cells.shape
+    left = int(round(x - {"sw": 0, "s": tw / 2.0, "se": tw}[anchor]))
+    top = int(round(y)) - th
+    _paste(img, left, top, cells, rgb)
+
+def _paste(img, left, top, mask, rgb):
+    """Set pixels of img marked in mask, placed at left, top, to rgb,
+    which is a color or an array of the shape of mask."""
+    h, w = img.shape[:2]
+    mh, mw = mask.shape
+    i0, j0 = max(top, 0), max(left, 0)
+    i1, j1 = min(top + mh, h), min(left + mw, w)
+    if i0 >= i1 or j0 >= j1:
+        return
+    sub = mask[i0-top:i1-top, j0-left:j1-left]
+    if isinstance(rgb, np.ndarray):
+        rgb = rgb[i0-top:i1-top, j0-left:j1-left][sub]
+    img[i0:i1, j0:j1][sub] = rgb
+
+
+def rasterize(cv):
+    """Render the display list of the RecordingCanvas cv into an
+    array of shape (height, width, 3) of 8 bit rgb values.
+    The rendered area is the scrollregion of the canvas.
+    """
+    x0, y0, x1, y1 = cv.scrollregion
+    width = max(int(round(x1 - x0)), 1)
+    height = max(int(round(y1 - y0)), 1)
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[...] = torgb(cv.bg) or (255, 255, 255)
+    origin = np.array((x0, y0))
+    rgbs = {}
+    def rgb(color):
+        if color not in rgbs:
+            rgbs[color] = torgb(color) if color else None
+        return rgbs[color]
+    for item in cv.order:
+        kind, cl = cv.kind[item], cv.coords[item]
+        if kind == "line" or kind == "polygon":
+            if cl is None or len(cl) < 2:
+                continue
+            points = np.frombuffer(cl, dtype=np.float64).reshape(-1, 2) - origin
+            if kind == "polygon":
+                fill = rgb(cv.fill[item])
+                if fill is not None and len(points) > 2:
+                    _fillpoly(img, points, fill)
+                outline = rgb(cv.outline[item])
+                if outline is not None:
+                    _stroke(img, np.vstack([points, points[:1]]), outline,
+                            cv.linewidth[item])
+            else:
+                fill = rgb(cv.fill[item])
+                if fill is not None:
+                    _stroke(img, points, fill, cv.linewidth[item])
+        elif kind == "text":
+            fill = rgb(cv.fill[item])
+            if fill is not None:
+                anchor, font = cv.style[item]
+                _text(img, cl[0] - x0, cl[1] - y0, cv.data[item], font,
+                      anchor, fill)
+        elif kind == "image":
+            pixels = _imagepixels(cv.data[item])
+            if pixels is not None:
+                rgbarray, opaque = pixels
+                h, w = opaque.shape
+                _paste(img, int(round(cl[0] - x0)) - w//2,
+                       int(round(cl[1] - y0)) - h//2, opaque, rgbarray)
+    return img
+
+
+class RasterCanvas(RecordingCanvas):
+    """Canvas of the raster backend.
+
+    A RecordingCanvas measuring text by the built in font,
+    whose image() is the rasterized drawing.
+    """
+    def _textsize(self, txt, font):
+        """Return width and height in pixels of txt written in font."""
+        scale = _fontscale(font)
+        return 6 * scale * len(txt), 8 * scale
+
+
+class RasterScreen(RecordingScreen):
+    """TurtleScreen drawing on a RasterCanvas.
+    """
+
+    @staticmethod
+    def _blankimage():
+        """returns a blank image object
+        """
+        return RasterImage()
+
+    @staticmethod
+    def _image(filename):
+        """returns an image object containing the
+        imagedata from a gif-file named filename.
+        """
+        return RasterImage(filename)
+
+
+registerBackend("raster", RasterScreen, RasterCanvas)
@@ -0,0 +1,518 @@
+"""Tk free rendering backend for cTurtle.
+
+The recording backend never touches a display. Everything drawn
+is kept as a display list on a RecordingCanvas, in lists indexed
+by the item ids, which RawPen tracks in its items list. So moving,
+configuring, raising and deleting items are plain list updates.
+
+The display list can be exported as PostScript, like a Tk canvas,
+so turtlecapture works unchanged with this backend.
+
+Select it with the environment variable TURTLEBACKEND=recording
+or by calling setBackend("recording") before creating a Pen.
+"""
+
+from array import array
+
+from .cTurtle import TurtleScreen, TG_Error, registerBackend
+from .colors import torgb
+
+
+_ANCHORS = {"left": "sw", "center": "s", "right": "se"}
+
+
+def _fontsize(font):
+    """Return the size in pixels of a Tk font description."""
+    if isinstance(font, str):
+        font = font.split()
+    size = 8
+    if len(font) > 1:
+        try:
+            size = int(font[1])
+        except ValueError:
+            pass
+    if size < 0:        # negative sizes are pixels in Tk
+        return -size
+    return size * 4 // 3
+
+
+
+class RecordingImage(object):
+    """Image object of the recording backend.
+
+    Stores the name of the gif-file and the size of the image,
+    which is read from the gif header.
+    """
+    def __init__(self, filename=None):
+        self.filename = filename
+        self._width = self._height = 1
+        if filename is not None:
+            with open(filename, "rb") as f:
+                header = f.read(10)
+            if header[:3] != b"GIF" or len(header) < 10:
+                raise TG_Error("%s is not a gif-file" % filename)
+            self._width = header[6] | header[7] << 8
+            self._height = header[8] | header[9] << 8
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+
+class RecordingCanvas(object):
+    """Canvas of the recording backend.
+
+    The display list is held in lists indexed by item id: kind,
+    coords (flat array of canvas coordinates, y pointing down as
+    on a Tk canvas), fill, outline, linewidth, data (text of a text
+    item or image of an image item) and style (anchor and font of
+    a text item). order holds the ids of the existing items in
+    stacking order, lowest first. tags maps each tag to its items,
+    in their stacking order relative to each other.
+    """
+    def __init__(self, width=500, height=350, canvwidth=600, canvheight=500):
+        self._root = None
+        self.width, self.height = width, height
+        self.bg = "white"
+        self.reset(canvwidth, canvheight)
+        # item ids start with 1, like on a Tk canvas
+        self.kind = [None]
+        self.coords = [None]
+        self.fill = [None]
+        self.outline = [None]
+        self.linewidth = [None]
+        self.data = [None]
+        self.style = [None]
+        self.order = {}
+        self.tags = {}
+        self.itemtags = [None]
+
+    def reset(self, canvwidth=None, canvheight=None, bg=None):
+        if canvwidth:
+            self.canvwidth = canvwidth
+        if canvheight:
+            self.canvheight = canvheight
+        if bg:
+            self.bg = bg
+        self.scrollregion = (-self.canvwidth//2, -self.canvheight//2,
+                              self.canvwidth//2, self.canvheight//2)
+
+    def _newitem(self, kind, coords, fill="", outline="", width=1,
+                 data=None, style=None):
+        """Append an item to the display list and return its id."""
+        item = len(self.kind)
+        self.kind.append(kind)
+        self.coords.append(coords)
+        self.fill.append(fill)
+        self.outline.append(outline)
+        self.linewidth.append(width)
+        self.data.append(data)
+        self.style.append(style)
+        self.itemtags.append(set())
+        self.order[item] = None
+        return item
+
+    def items(self):
+        """Return the ids of all items in stacking order."""
+        return list(self.order)
+
+    def _find(self, tagorid):
+        """Return the items with tag or id tagorid."""
+        if isinstance(tagorid, str):
+            return list(self.tags.get(tagorid, ()))
+        return [tagorid] if tagorid in self.order else []
+
+    def gettags(self, item):
+        return tuple(self.itemtags[item] or ())
+
+    def addtag_withtag(self, newtag, tagorid):
+        for item in self._find(tagorid):
+            self.tags.setdefault(newtag, {})[item] = None
+            self.itemtags[item].add(newtag)
+
+    def dtag(self, tagorid, tagtodelete=None):
+        if tagtodelete is None:
+            tagtodelete = tagorid
+        for item in self._find(tagorid):
+            if tagtodelete in self.itemtags[item]:
+                self.itemtags[item].discard(tagtodelete)
+                del self.tags[tagtodelete][item]
+
+    def delete(self, tagorid):
+        for item in self._find(tagorid):
+            for tag in self.itemtags[item]:
+                del self.tags[tag][item]
+            self.itemtags[item] = None
+            del self.order[item]
+            self.kind[item] = self.coords[item] = self.data[item] = None
+
+    def move(self, tagorid, dx, dy):
+        for item in self._find(tagorid):
+            cl = self.coords[item]
+            for i in range(0, len(cl), 2):
+                cl[i] += dx
+                cl[i + 1] += dy
+
+    def tag_raise(self, tagorid):
+        for item in self._find(tagorid):
+            del self.order[item]
+            self.order[item] = None
+            for tag in self.itemtags[item]:
+                tagged = self.tags[tag]
+                del tagged[item]
+                tagged[item] = None
+
+    def tag_lower(self, item):
+        if item in self.order:
+            del self.order[item]
+            order = {item: None}
+            order.update(self.order)
+            self.order = order
+            for tag in self.itemtags[item]:
+                tagged = {item: None}
+                tagged.update(self.tags[tag])
+                self.tags[tag] = tagged
+
+    def bbox(self, item):
+        """Return the bounding box of item as a tuple x0, y0, x1, y1."""
+        kind, cl = self.kind[item], self.coords[item]
+        if kind == "text":
+            anchor, font = self.style[item]
+            w, h = self._textsize(self.data[item], font)
+            x, y = cl
+            x0 = {"sw": x, "s": x - w/2.0, "se": x - w}[anchor]
+            return int(x0), int(y - h), int(x0 + w), int(y)
+        if kind == "image":
+            x, y = cl
+            image = self.data[item]
+            w, h = (image.width(), image.height()) if image else (0, 0)
+            return int(x - w//2), int(y - h//2), int(x + w - w//2), int(y + h - h//2)
+        d = self.linewidth[item] / 2.0
+        xs, ys = cl[0::2], cl[1::2]
+        return (int(min(xs) - d), int(min(ys) - d),
+                int(max(xs) + d + 1), int(max(ys) + d + 1))
+
+    def _textsize(self, txt, font):
+        """Return an estimate of width and height in pixels of txt
+        written in font."""
+        size = _fontsize(font)
+        return int(round(0.6 * size * len(txt))), size * 6 // 5
+
+    def update(self):
+        pass
+
+    def config(self, bg=None, scrollregion=None, **kwargs):
+        if bg is not None:
+            self.bg = bg
+        if scrollregion is not None:
+            self.scrollregion = scrollregion
+
+    configure = config
+
+    def cget(self, option):
+        if option == "bg":
+            return self.bg
+        if option == "width":
+            return str(self.canvwidth)
+        if option == "height":
+            return str(self.canvheight)
+        raise TG_Error("unknown option %s" % option)
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def image(self):
+        """Return the drawing rasterized into an array of shape
+        (height, width, 3) of 8 bit rgb values. Requires NumPy.
+        """
+        from .raster import rasterize
+        return rasterize(self)
+
+    def postscript(self, file=None, colormode="color"):
+        """Return the display list as PostScript or write it to file.
+        The exported area is the scrollregion of the canvas.
+        """
+        x0, y0, x1, y1 = self.scrollregion
+        w, h = x1 - x0, y1 - y0
+        out = ["%!PS-Adobe-3.0 EPSF-3.0",
+               "%%%%BoundingBox: 0 0 %d %d" % (int(round(w)), int(round(h))),
+               "%%EndComments",
+               "gsave",
+               "0 %r translate 1 -1 scale %r %r translate" % (h, -x0, -y0),
+               "1 setlinecap 1 setlinejoin"]
+        rgb = _psrgb(self.bg)
+        if rgb:
+            out.append("%s setrgbcolor %r %r %r %r rectfill" % (rgb, x0, y0, w, h))
+        for item in self.order:
+            kind, cl = self.kind[item], self.coords[item]
+            if kind == "line" or kind == "polygon":
+                path = _pspath(cl)
+                if path is None:
+                    continue
+                fill = _psrgb(self.fill[item])
+                if kind == "polygon" and fill:
+                    out.append("%s closepath %s setrgbcolor eofill" % (path, fill))
+                stroke = _psrgb(self.fill[item] if kind == "line"
+                                else self.outline[item])
+                if stroke:
+                    if kind == "polygon":
+                        path += " closepath"
+                    out.append("%s %s setrgbcolor %r setlinewidth stroke" %
+                               (path, stroke, self.linewidth[item]))
+            elif kind == "text":
+                fill = _psrgb(self.fill[item])
+                if not fill:
+                    continue
+                anchor, font = self.style[item]
+                size = _fontsize(font)
+                shift = {"sw": 0, "s": 0.5, "se": 1}[anchor]
+                out.append("gsave %.2f %.2f translate 1 -1 scale %s setrgbcolor "
+                           "/%s findfont %d scalefont setfont (%s) dup "
+                           "stringwidth pop %r mul neg %r moveto show grestore" %
+                           (cl[0], cl[1], fill, _psfont(font), size,
+                            _psstring(self.data[item]), shift, 0.2*size))
+        out.extend(["grestore", "showpage", "%%EOF", ""])
+        ps = "\n".join(out)
+        if file is None:
+            return ps
+        with open(file, "w") as f:
+            f.write(ps)
+        return ""
+
+
+def _psrgb(color):
+    """Return PostScript rgb operands for color or None if transparent."""
+    if not color:
+        return None
+    rgb = torgb(color)
+    if rgb is None:
+        return None
+    return "%.4f %.4f %.4f" % tuple(c / 255.0 for c in rgb)
+
+def _pspath(cl):
+    if cl is None or len(cl) < 4:
+        return None
+    parts = ["newpath %.2f %.2f moveto" % (cl[0], cl[1])]
+    for i in range(2, len(cl), 2):
+        parts.append("%.2f %.2f lineto" % (cl[i], cl[i+1]))
+    return " ".join(parts)
+
+def _psfont(font):
+    if isinstance(font, str):
+        font = font.split()
+    family = str(font[0]).lower() if font else ""
+    style = " ".join(str(s) for s in font[2:]).lower()
+    if "courier" in family:
+        name, bold, italic = "Courier", "-Bold", "-Oblique"
+    elif "times" in family:
+        name, bold, italic = "Times", "-Bold", "-Italic"
+    else:
+        name, bold, italic = "Helvetica", "-Bold", "-Oblique"
+    suffix = ""
+    if "bold" in style:
+        suffix += bold
+    if "italic" in style:
+        suffix += italic.lstrip("-") if suffix else italic
+    if name == "Times" and not suffix:
+        suffix = "-Roman"
+    return name + suffix
+
+def _psstring(txt):
+    return txt.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class RecordingScreen(TurtleScreen):
+    """TurtleScreen drawing on a RecordingCanvas.
+
+    Reimplements the primitives of TurtleScreenBase as updates
+    of the canvas' display list. There are no events: click,
+    key and timer bindings are ignored.
+    """
+
+    # nothing is redisplayed, so lines are only split to bound the
+    # size of single items
+    _LINESPLIT = 10000
+
+    @staticmethod
+    def _blankimage():
+        """returns a blank image object
+        """
+        return RecordingImage()
+
+    @staticmethod
+    def _image(filename):
+        """returns an image object for the gif-file filename
+        """
+        return RecordingImage(filename)
+
+    @staticmethod
+    def _imagevalid(image):
+        """images do not depend on a Tk interpreter"""
+        return True
+
+    def _transform(self, coordlist, xform):
+        """Return flat array of canvas coordinates of coordlist."""
+        if xform:
+            xs, ys = self.xscale, -self.yscale
+        else:
+            xs, ys = 1.0, -1.0
+        cl = array("d")
+        for x, y in coordlist:
+            cl.append(x * xs)
+            cl.append(y * ys)
+        return cl
+
+    def _createpoly(self):
+        """Creates an invisible polygon item on canvas self.cv)
+        """
+        return self.cv._newitem("polygon", array("d", (0,)*6))
+
+    def _drawpoly(self, polyitem, coordlist, fill=None,
+                  outline=None, width=None, top=False, xform=True):
+        """configures polygonitem polyitem according to provided
+        arguments, see TurtleScreenBase._drawpoly
+        """
+        cv = self.cv
+        cv.coords[polyitem] = self._transform(coordlist, xform)
+        if fill is not None:
+            cv.fill[polyitem] = fill
+        if outline is not None:
+            cv.outline[polyitem] = outline
+        if width is not None:
+            cv.linewidth[polyitem] = width
+        if top:
+            cv.tag_raise(polyitem)
+
+    def _createline(self):
+        """Creates an invisible line item on canvas self.cv)
+        """
+        return self.cv._newitem("line", array("d", (0,)*4), width=2)
+
+    def _drawline(self, lineitem, coordlist=None,
+                  fill=None, width=None, top=False, xform=True):
+        """configures lineitem according to provided arguments,
+        see TurtleScreenBase._drawline
+        """
+        cv = self.cv
+        if coordlist is not None:
+            cv.coords[lineitem] = self._transform(coordlist, xform)
+        if fill is not None:
+            cv.fill[lineitem] = fill
+        if width is not None:
+            cv.linewidth[lineitem] = width
+        if top:
+            cv.tag_raise(lineitem)
+
+    def _extendline(self, lineitem, coordlist, xform=True):
+        """appends the points of coordlist to lineitem
+        """
+        self.cv.coords[lineitem].extend(self._transform(coordlist, xform))
+
+    def _delete(self, item):
+        """deletes graphics item, or all items tagged item, from canvas
+        """
+        self.cv.delete(item)
+
+    def _raise(self, item):
+        """puts item, or all items tagged item, on top of the
+        canvas' displaylist
+        """
+        self.cv.tag_raise(item)
+
+    def _tag(self, item, tag):
+        """adds tag to the tags of item
+        """
+        self.cv.addtag_withtag(tag, item)
+
+    def _move(self, item, dx, dy):
+        """moves item, or all items tagged item, by dx, dy
+        """
+        self.cv.move(item, dx, -dy)
+
+    def _untag(self, item):
+        """removes all tags of item
+        """
+        for tag in self.cv.gettags(item):
+            self.cv.dtag(item, tag)
+
+    def _update(self):
+        """nothing to redraw"""
+
+    def _delay(self, delay):
+        """no display, so no delay"""
+
+    def _isColorString(self, color):
+        """Checks if the string color is a legal
+        Tk color string.
+        """
+        return torgb(color) is not None
+
+    def _bgcolor(self, color=None):
+        """Set canvas' backgroundcolor if color is not None,
+        else return backgroundcolor."""
+        if color is not None:
+            self.cv.bg = color
+        else:
+            return self.cv.bg
+
+    def _write(self, pos, txt, align, font, pencolor, move=True):
+        """Write txt at pos in canvas with specified font
+        and color.
+        Return text item and x-coord of right bottom corner
+        of text's bounding box, or None if move is false."""
+        x, y = pos
+        nx = x * self.xscale
+        ny = y * self.yscale
+        item = self.cv._newitem("text", array("d", (nx-1, -ny)), pencolor,
+                                data=txt, style=(_ANCHORS[align], font))
+        if not move:
+            return item, None
+        x0, y0, x1, y1 = self.cv.bbox(item)
+        return item, x1-1
+
+    def _onClick(self, fun, num=1):
+        """no events without a display"""
+
+    def _onKey(self, fun, key):
+        """no events without a display"""
+
+    def _listen(self):
+        """no events without a display"""
+
+    def _onTimer(self, fun, t):
+        """no events without a display"""
+
+    def _createimage(self, image):
+        """Create and return image item on canvas.
+        """
+        return self.cv._newitem("image", array("d", (0, 0)), data=image)
+
+    def _drawimage(self, item, pos, image):
+        """Configure image item as to draw image object
+        at position (x,y) on canvas)
+        """
+        x, y = pos
+        self.cv.coords[item] = array("d", (x, -y))
+        self.cv.data[item] = image
+
+    def _setbgpic(self, item, image):
+        """Configure image item as to draw image object
+        at center of canvas. Set item to the first item
+        in the displaylist, so it will be drawn below
+        any other item ."""
+        self.cv.data[item] = image
+        self.cv.tag_lower(item)
+
+    def resize(self, canvwidth=None, canvheight=None, bg=None):
+        if canvwidth is None or canvheight is None:
+            return self.cv.canvwidth, self.cv.canvheight
+        self.cv.reset(canvwidth, canvheight, bg)
+        self.canvwidth, self.canvheight = canvwidth, canvheight
+
+
+registerBackend("recording", RecordingScreen, RecordingCanvas)
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the tests draw without a display
+os.environ['TURTLEBACKEND'] = 'recording'
+
+
+@pytest.fixture
+def fresh():
+    """Start and end the test without screens or default pen."""
+    from cTurtle import cTurtle
+    cTurtle._destroyall()
+    yield
+    cTurtle._destroyall()
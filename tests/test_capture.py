@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from turtlecapture import CaptureCache, read_manifest
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+def result(script, image, status='ok', seconds=0.5):
+    return {'script': script, 'image': image, 'status': status,
+            'seconds': seconds, 'error': None}
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    script = write(root / 'drawing.py',
+                   'import helper\nfrom cTurtle import *\n'
+                   'addshape("ship.gif")\n')
+    write(root / 'helper.py', 'SIZE = 10\n')
+    write(root / 'ship.gif', 'GIF89a')
+    write(root / 'unused.py', 'SIZE = 20\n')
+    return root, script
+
+
+def test_key_is_stable(tmp_path, project):
+    root, script = project
+    cache = CaptureCache(str(tmp_path / 'cache'))
+    assert cache.key(script) == CaptureCache(str(tmp_path / 'other')).key(
+        script)
+    assert cache.key(script) != cache.key(script, argv=[script, '-x'])
+    assert cache.key(script) != cache.key(script, stdin=b'input')
+    assert cache.key(script, backend='tk') != \
+        cache.key(script, backend='raster')
+
+
+@pytest.mark.parametrize('name, changed', [
+    ('drawing.py', 'import helper\nfd(1)\naddshape("ship.gif")\n'),
+    ('helper.py', 'SIZE = 11\n'),
+    ('ship.gif', 'GIF87a')])
+def test_key_covers_local_files(tmp_path, project, name, changed):
+    root, script = project
+    cache = CaptureCache(str(tmp_path / 'cache'))
+    key = cache.key(script)
+    write(root / 'unused.py', 'SIZE = 21\n')
+    assert cache.key(script) == key
+    write(root / name, changed)
+    assert cache.key(script) != key
+
+
+def test_get_and_put(tmp_path, project):
+    root, script = project
+    cache = CaptureCache(str(tmp_path / 'cache'))
+    key = cache.key(script)
+    png_path = str(tmp_path / 'drawing.png')
+    assert cache.get(key, png_path) is None
+    image = write(tmp_path / 'captured.png', 'pixels')
+    cache.put(key, result(script, image))
+    cached = cache.get(key, png_path)
+    assert cached == dict(result(script, png_path), cached=True)
+    with open(png_path) as png:
+        assert png.read() == 'pixels'
+
+
+def test_put_skips_failures(tmp_path, project):
+    root, script = project
+    cache = CaptureCache(str(tmp_path / 'cache'))
+    image = write(tmp_path / 'captured.png', 'pixels')
+    postscript = write(tmp_path / 'captured.eps', 'pixels')
+    for failed in (result(script, image, status='timeout'),
+                   result(script, None, status='error', seconds=None),
+                   result(script, postscript)):
+        cache.put('key', failed)
+        assert cache.get('key', str(tmp_path / 'drawing.png')) is None
+    cache.put('key', result(script, None, status='error'))
+    assert cache.get('key', str(tmp_path / 'drawing.png'))['image'] is None
+
+
+def test_eviction(tmp_path, project):
+    root, script = project
+    directory = tmp_path / 'cache'
+    image = write(tmp_path / 'captured.png', 'x' * 1000)
+    cache = CaptureCache(str(directory), max_size=2500)
+
+    def age(key, seconds):
+        path = str(directory / (key + '.json'))
+        mtime = os.path.getmtime(path) - seconds
+        os.utime(path, (mtime, mtime))
+
+    cache.put('a', result(script, image))
+    age('a', 30)
+    cache.put('b', result(script, image))
+    age('b', 20)
+    assert sorted(os.listdir(str(directory))) == \
+        ['a.json', 'a.png', 'b.json', 'b.png']
+    # a was used last, so b is removed
+    assert cache.get('a', str(tmp_path / 'drawing.png')) is not None
+    cache.put('c', result(script, image))
+    assert sorted(os.listdir(str(directory))) == \
+        ['a.json', 'a.png', 'c.json', 'c.png']
+
+
+def test_read_manifest(tmp_path):
+    manifest = write(tmp_path / 'examples' / 'manifest.txt', '\n'.join([
+        '# the drawings of the tutorial',
+        'spiral.py',
+        '',
+        '  chapter2/tree.py  ',
+        'chapter2/snow.py flake',
+        '/abs/path/star.py star image']))
+    base = str(tmp_path / 'examples')
+    assert read_manifest(manifest) == [
+        (os.path.join(base, 'spiral.py'), 'spiral'),
+        (os.path.join(base, 'chapter2', 'tree.py'), 'chapter2_tree'),
+        (os.path.join(base, 'chapter2', 'snow.py'), 'flake'),
+        ('/abs/path/star.py', 'star image')]
@@ -0,0 +1,23 @@
+from cTurtle.colors import torgb
+
+
+def test_names():
+    assert torgb("red") == (255, 0, 0)
+    assert torgb("Dark Orange") == (255, 140, 0)
+    assert torgb("darkorange") == (255, 140, 0)
+    assert torgb("DARK ORANGE") == (255, 140, 0)
+    assert torgb("gray50") == (127, 127, 127)
+
+
+def test_hexadecimal():
+    assert torgb("#f80") == (255, 136, 0)
+    assert torgb("#33cc8c") == (51, 204, 140)
+    assert torgb("#33cc8c") == torgb("#33CC8C")
+    # like Tk, the high order bits are kept
+    assert torgb("#fffa00123") == (255, 160, 18)
+    assert torgb("#ffff80001234") == (255, 128, 18)
+
+
+def test_illegal():
+    for color in ("", "#", "#12", "#1234", "#12345g", "nocolor", "red2x"):
+        assert torgb(color) is None
@@ -0,0 +1,166 @@
+import base64
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from cTurtle.cTurtle import TG_Error
+from cTurtle.raster import _lzwdecode, _readgif
+
+
+def lzw_encode(pixels, minsize):
+    """Compress pixels like a gif encoder, with variable code sizes and a
+    clear code whenever the table is full."""
+    clear, end = 1 << minsize, (1 << minsize) + 1
+    out = bytearray()
+    state = {'bits': 0, 'count': 0}
+
+    def emit(code, size):
+        state['bits'] |= code << state['count']
+        state['count'] += size
+        while state['count'] >= 8:
+            out.append(state['bits'] & 0xff)
+            state['bits'] >>= 8
+            state['count'] -= 8
+
+    def reset():
+        # the size follows the table of the decoder, which grows one
+        # code later than that of the encoder
+        return ({bytes((i,)): i for i in range(clear)}, end + 1,
+                minsize + 1, clear + 2, True)
+
+    table, following, size, decoded, first = reset()
+    emit(clear, size)
+    word = b''
+    for pixel in pixels:
+        extended = word + bytes((pixel,))
+        if extended in table:
+            word = extended
+            continue
+        emit(table[word], size)
+        if not first:
+            decoded += 1
+        first = False
+        if decoded == 1 << size and size < 12:
+            size += 1
+        table[extended] = following
+        following += 1
+        if following == 4096:
+            emit(clear, size)
+            table, following, size, decoded, first = reset()
+        word = bytes((pixel,))
+    emit(table[word], size)
+    if not first:
+        decoded += 1
+    if decoded == 1 << size and size < 12:
+        size += 1
+    emit(end, size)
+    if state['count']:
+        out.append(state['bits'] & 0xff)
+    return bytes(out)
+
+
+def make_gif(index, palette, transparent=None, interlace=False,
+             position=(0, 0), screen=None):
+    """Return a gif-file of the palette indices index."""
+    height, width = index.shape
+    screen_width, screen_height = screen or (width, height)
+    depth = max(1, (len(palette) - 1).bit_length())
+    table = np.zeros((1 << depth, 3), np.uint8)
+    table[:len(palette)] = palette
+    data = b'GIF89a' + struct.pack('<HHBBB', screen_width, screen_height,
+                                   0x80 | (depth - 1), 0, 0)
+    data += table.tobytes()
+    if transparent is not None:
+        data += struct.pack('<BBBBHBB', 0x21, 0xf9, 4, 1, 0, transparent, 0)
+    if interlace:
+        rows = np.concatenate([np.arange(0, height, 8),
+                               np.arange(4, height, 8),
+                               np.arange(2, height, 4),
+                               np.arange(1, height, 2)])
+        index = index[rows]
+    data += struct.pack('<BHHHHB', 0x2c, position[0], position[1], width,
+                        height, 0x40 if interlace else 0)
+    minsize = max(2, depth)
+    compressed = lzw_encode(index.astype(np.uint8).tobytes(), minsize)
+    data += bytes((minsize,))
+    for i in range(0, len(compressed), 255):
+        chunk = compressed[i:i+255]
+        data += bytes((len(chunk),)) + chunk
+    return data + b'\0;'
+
+
+def read(tmp_path, data):
+    path = tmp_path / 'image.gif'
+    path.write_bytes(data)
+    return _readgif(str(path))
+
+
+def test_lzw_round_trip():
+    rng = np.random.RandomState(3)
+    for minsize, pixels in [
+            (2, bytes(100)),                       # one long run
+            (2, bytes(rng.randint(0, 4, 5000))),
+            (8, bytes(rng.randint(0, 256, 20000)))]:   # full tables
+        assert bytes(_lzwdecode(lzw_encode(pixels, minsize),
+                                minsize)) == pixels
+
+
+def test_lzw_corrupt():
+    # the first code after the clear code is beyond the table
+    with pytest.raises(TG_Error):
+        _lzwdecode(b'\x07', 2)
+
+
+def test_colors(tmp_path):
+    rng = np.random.RandomState(5)
+    palette = rng.randint(0, 256, (256, 3)).astype(np.uint8)
+    index = rng.randint(0, 256, (37, 53))
+    rgb, opaque = read(tmp_path, make_gif(index, palette))
+    assert np.array_equal(rgb, palette[index])
+    assert opaque.all()
+
+
+def test_transparency(tmp_path):
+    palette = np.array([[255, 0, 0], [0, 0, 255], [0, 255, 0]], np.uint8)
+    index = np.arange(12).reshape(3, 4) % 3
+    rgb, opaque = read(tmp_path, make_gif(index, palette, transparent=1))
+    assert np.array_equal(opaque, index != 1)
+    assert np.array_equal(rgb, palette[index])
+
+
+def test_interlace(tmp_path):
+    palette = np.array([[0, 0, 0], [255, 255, 255]], np.uint8)
+    index = np.random.RandomState(7).randint(0, 2, (19, 6))
+    rgb, opaque = read(tmp_path, make_gif(index, palette, interlace=True))
+    assert np.array_equal(rgb, palette[index])
+
+
+def test_position(tmp_path):
+    palette = np.array([[0, 0, 0], [255, 255, 255]], np.uint8)
+    index = np.ones((2, 3), int)
+    rgb, opaque = read(tmp_path, make_gif(index, palette, position=(1, 2),
+                                          screen=(5, 5)))
+    assert np.array_equal(opaque, np.pad(np.ones((2, 3), bool),
+                                         ((2, 1), (1, 1))))
+    assert np.array_equal(rgb[..., 0], 255 * opaque)
+
+
+def test_foreign_gifs(tmp_path):
+    # one white pixel and one transparent pixel, as written by other
+    # encoders
+    rgb, opaque = read(tmp_path, base64.b64decode(
+        'R0lGODlhAQABAIAAAP///wAAACwAAAAAAQABAAACAkQBADs='))
+    assert rgb.tolist() == [[[255, 255, 255]]] and opaque.all()
+    rgb, opaque = read(tmp_path, base64.b64decode(
+        'R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'))
+    assert not opaque.any()
+
+
+def test_not_a_gif(tmp_path):
+    with pytest.raises(TG_Error):
+        read(tmp_path, b'\x89PNG\r\n\x1a\n')
+    with pytest.raises(TG_Error):
+        read(tmp_path, make_gif(np.zeros((1, 1), int),
+                                np.zeros((2, 3), np.uint8))[:19] + b';')
@@ -0,0 +1,133 @@
+import struct
+import zlib
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from turtlecapture import PNG_SIGNATURE, encode_png
+
+
+def decode_png(data):
+    """Return the bit depth, color type and rgb pixels of a PNG file
+    of 8 bit rgb or palette pixels, checking the chunk checksums."""
+    assert data[:8] == PNG_SIGNATURE
+    pos = 8
+    palette = None
+    idat = []
+    while pos < len(data):
+        length, tag = struct.unpack('>I4s', data[pos:pos+8])
+        body = data[pos+8:pos+8+length]
+        crc, = struct.unpack('>I', data[pos+8+length:pos+12+length])
+        assert crc == zlib.crc32(tag + body) & 0xffffffff
+        pos += 12 + length
+        if tag == b'IHDR':
+            width, height, bits, color_type, compression, filtering, \
+                interlace = struct.unpack('>IIBBBBB', body)
+            assert (compression, filtering, interlace) == (0, 0, 0)
+        elif tag == b'PLTE':
+            palette = np.frombuffer(body, np.uint8).reshape(-1, 3)
+        elif tag == b'IDAT':
+            idat.append(body)
+        elif tag == b'IEND':
+            break
+    assert pos == len(data)
+    channels = 3 if color_type == 2 else 1
+    bpp = max(1, bits * channels // 8)
+    stride = (width * bits * channels + 7) // 8
+    raw = zlib.decompress(b''.join(idat))
+    assert len(raw) == height * (stride + 1)
+    rows = []
+    prior = bytearray(stride)
+    for y in range(height):
+        line = raw[y*(stride+1):(y+1)*(stride+1)]
+        kind, row = line[0], bytearray(line[1:])
+        for i in range(stride):
+            a = row[i-bpp] if i >= bpp else 0
+            b = prior[i]
+            c = prior[i-bpp] if i >= bpp else 0
+            if kind == 1:
+                row[i] = (row[i] + a) & 0xff
+            elif kind == 2:
+                row[i] = (row[i] + b) & 0xff
+            elif kind == 3:
+                row[i] = (row[i] + (a + b) // 2) & 0xff
+            elif kind == 4:
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                if pa <= pb and pa <= pc:
+                    predictor = a
+                elif pb <= pc:
+                    predictor = b
+                else:
+                    predictor = c
+                row[i] = (row[i] + predictor) & 0xff
+            else:
+                assert kind == 0
+        rows.append(bytes(row))
+        prior = row
+    packed = np.frombuffer(b''.join(rows), np.uint8).reshape(height, stride)
+    if color_type == 2:
+        return bits, color_type, packed.reshape(height, width, 3)
+    assert color_type == 3
+    shifts = 8 - bits * np.arange(1, 8 // bits + 1)
+    index = (packed[:, :, None] >> shifts) & ((1 << bits) - 1)
+    index = index.reshape(height, -1)[:, :width]
+    assert index.max() < len(palette)
+    return bits, color_type, palette[index]
+
+
+def image_with_colors(count, width=13, height=7, seed=1):
+    """Return a random image using exactly count colors."""
+    rng = np.random.RandomState(seed)
+    colors = np.unique(rng.randint(0, 1 << 24, 2 * count))
+    colors = rng.permutation(colors)[:count]
+    colors = np.stack([colors >> 16, colors >> 8 & 0xff, colors & 0xff], 1)
+    index = np.arange(width * height) % count
+    rng.shuffle(index)
+    return colors[index].reshape(height, width, 3).astype(np.uint8)
+
+
+@pytest.mark.parametrize('count, bits', [(1, 1), (2, 1), (3, 2), (4, 2),
+                                         (16, 4), (17, 8), (256, 8)])
+def test_palette_depths(count, bits):
+    pixels = image_with_colors(count, width=19, height=17)
+    depth, color_type, decoded = decode_png(encode_png(pixels))
+    assert (depth, color_type) == (bits, 3)
+    assert np.array_equal(decoded, pixels)
+
+
+@pytest.mark.parametrize('width', [1, 7, 8, 9, 31])
+def test_palette_row_padding(width):
+    pixels = image_with_colors(2, width=width, height=3)
+    depth, color_type, decoded = decode_png(encode_png(pixels))
+    assert depth == 1
+    assert np.array_equal(decoded, pixels)
+
+
+def test_truecolor():
+    pixels = image_with_colors(1000, width=23, height=60)
+    # gradients and flat areas, which select the other filter types
+    pixels[:10] = np.arange(23)[None, :, None] * 11
+    pixels[10:20] = np.arange(10)[:, None, None] * 25
+    pixels[20:30, :5] = 200
+    depth, color_type, decoded = decode_png(encode_png(pixels))
+    assert (depth, color_type) == (8, 2)
+    assert np.array_equal(decoded, pixels)
+
+
+def test_truecolor_without_palette():
+    pixels = image_with_colors(2)
+    depth, color_type, decoded = decode_png(encode_png(pixels, palette=False))
+    assert (depth, color_type) == (8, 2)
+    assert np.array_equal(decoded, pixels)
+
+
+def test_quantize():
+    pixels = image_with_colors(1000, width=40, height=30)
+    depth, color_type, decoded = decode_png(encode_png(pixels, quantize=True))
+    assert (depth, color_type) == (8, 3)
+    assert len(np.unique(decoded.reshape(-1, 3), axis=0)) <= 6 * 7 * 6
+    # each channel is rounded to the nearest level of the color cube
+    error = abs(decoded.astype(int) - pixels)
+    assert (error.max(axis=(0, 1)) <= [26, 22, 26]).all()
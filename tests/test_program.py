@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+import cTurtle
+from cTurtle import program as program_module
+from cTurtle import Program, lsystem
+
+
+def drawing(pen):
+    """Return the position and heading of pen and the points of its
+    visible lines."""
+    canvas = pen.getCanvas()
+    lines = [list(canvas.coords[item]) for item in canvas.items()
+             if canvas.kind[item] == 'line' and canvas.fill[item]]
+    return pen.pos(), pen.heading(), lines
+
+
+def assert_same(drawn, expected):
+    (position, heading, lines), (position2, heading2, lines2) = \
+        drawn, expected
+    assert position == pytest.approx(position2, abs=1e-6)
+    assert heading == pytest.approx(heading2, abs=1e-6)
+    assert [len(line) for line in lines] == [len(line) for line in lines2]
+    for line, line2 in zip(lines, lines2):
+        assert line == pytest.approx(line2, abs=1e-6)
+
+
+def commands(count, seed=2):
+    rng = random.Random(seed)
+    choices = [('fd', 'forward'), ('bk', 'back'), ('lt', 'left'),
+               ('rt', 'right')]
+    result = []
+    for i in range(count):
+        name = rng.choice(choices)[i % 2]
+        value = rng.choice([90, 180, -90, 45, 30, 7.5, rng.uniform(-50, 50)])
+        result.append((name, value))
+        if i % 37 == 0:
+            result.append(('pu',))
+        elif i % 37 == 11:
+            result.append(('pd',))
+    return result
+
+
+def stepwise(commands, degrees=True):
+    cTurtle.cTurtle._destroyall()
+    pen = cTurtle.Pen()
+    pen.speed(0)
+    if not degrees:
+        pen.radians()
+    for command in commands:
+        getattr(pen, command[0])(*command[1:])
+    return drawing(pen)
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_program(fresh, monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(program_module, 'np', None)
+    elif program_module.np is None:
+        pytest.skip('NumPy is not installed')
+    moves = commands(500)
+    program = Program()
+    for command in moves:
+        getattr(program, command[0])(*command[1:])
+    assert len(program) == len(moves)
+    pen = cTurtle.Pen()
+    pen.speed(0)
+    program.run(pen)
+    assert_same(drawing(pen), stepwise(moves))
+    # the program is kept and can be run again
+    cTurtle.cTurtle._destroyall()
+    pen = cTurtle.Pen()
+    pen.speed(0)
+    program.run(pen)
+    program.run(pen)
+    assert_same(drawing(pen), stepwise(moves + moves))
+
+
+def test_program_radians(fresh):
+    moves = [('fd', 50), ('lt', 0.5), ('fd', 20), ('rt', 2), ('bk', 30)]
+    program = Program()
+    for command in moves:
+        getattr(program, command[0])(*command[1:])
+    pen = cTurtle.Pen()
+    pen.speed(0)
+    pen.radians()
+    program.run(pen)
+    assert_same(drawing(pen), stepwise(moves, degrees=False))
+
+
+def test_run(fresh):
+    moves = commands(25000) + [('color', 'red')] + commands(100, seed=3)
+    pen = cTurtle.Pen()
+    pen.speed(0)
+    pen.run(iter(moves))
+    assert_same(drawing(pen), stepwise(moves))
+
+
+def test_lsystem_expansion():
+    actions = {'F': ('fd', 1), '+': ('lt', 90), '-': ('rt', 90)}
+    rules = {'X': 'X+YF+', 'Y': '-FX-Y'}
+    word = 'FX'
+    for depth in range(8):
+        expected = [actions[symbol] for symbol in word if symbol in actions]
+        assert list(lsystem('FX', rules, depth, actions)) == expected
+        word = ''.join(rules.get(symbol, symbol) for symbol in word)
+
+
+def test_lsystem(fresh):
+    actions = {'F': ('fd', 3), '+': ('lt', 60), '-': ('rt', 60)}
+    koch = list(lsystem('F', {'F': 'F+F--F+F'}, 4, actions))
+    assert koch.count(('fd', 3)) == 4 ** 4
+    pen = cTurtle.Pen()
+    pen.speed(0)
+    pen.run(lsystem('F', {'F': 'F+F--F+F'}, 4, actions))
+    assert_same(drawing(pen), stepwise(koch))
+    assert pen.pos() == pytest.approx((3 ** 5, 0))
@@ -0,0 +1,82 @@
+import pytest
+
+import cTurtle
+
+
+def display_list(canvas):
+    """Return the visible items of canvas in stacking order as tuples
+    of kind, coordinates, fill, outline, width, data and tags."""
+    items = []
+    for item in canvas.items():
+        if canvas.kind[item] == 'image' or \
+                not (canvas.fill[item] or canvas.outline[item]):
+            continue
+        items.append((canvas.kind[item],
+                      pytest.approx(list(canvas.coords[item]), abs=1e-9),
+                      canvas.fill[item], canvas.outline[item],
+                      canvas.linewidth[item], canvas.data[item],
+                      sorted(canvas.itemtags[item])))
+    return items
+
+
+@pytest.fixture
+def pen(fresh):
+    pen = cTurtle.Pen()
+    pen.speed(0)
+    return pen
+
+
+def test_lines(pen):
+    pen.fd(100)
+    pen.lt(90)
+    pen.fd(50)
+    pen.pu()
+    pen.fd(10)
+    pen.pd()
+    pen.color('red')
+    pen.pensize(3)
+    pen.fd(20)
+    tag = pen._tag
+    assert display_list(pen.getCanvas()) == [
+        # canvas coordinates: y points down
+        ('line', [0, 0, 100, 0, 100, -50], 'black', '', 1, None, [tag]),
+        ('line', [100, -60, 100, -80], 'red', '', 3, None, [tag]),
+        ('polygon', [90, -80, 110, -80, 100, -90], 'red', 'red', 3, None,
+         ['turtles'])]
+
+
+def test_fill_and_text(pen):
+    pen.fillcolor('blue')
+    pen.fill(True)
+    pen.fd(30)
+    pen.lt(90)
+    pen.fd(30)
+    pen.fill(False)
+    pen.write('hi', font=('Arial', 12, 'bold'))
+    canvas = pen.getCanvas()
+    tag = pen._tag
+    assert display_list(canvas)[:3] == [
+        # the fill lies below the outline drawn around it
+        ('polygon', [0, 0, 30, 0, 30, -30], 'blue', '', 1, None, [tag]),
+        ('line', [0, 0, 30, 0, 30, -30], 'black', '', 1, None, [tag]),
+        ('text', [29, -30], 'black', '', 1, 'hi', [tag])]
+    text = canvas.items()[-2]
+    assert canvas.style[text] == ('sw', ('Arial', 12, 'bold'))
+
+
+def test_turtles_on_top(pen):
+    pen.fd(10)
+    other = cTurtle.Pen()
+    other.speed(0)
+    other.goto(10, 10)
+    pen.fd(10)
+    canvas = pen.getCanvas()
+    kinds = [(kind, tags[0]) for kind, coords, fill, outline, width, data,
+             tags in display_list(canvas)]
+    assert kinds == [('line', pen._tag), ('line', other._tag),
+                     ('polygon', 'turtles'), ('polygon', 'turtles')]
+    pen.clear()
+    kinds = [(kind, tags[0]) for kind, coords, fill, outline, width, data,
+             tags in display_list(canvas)]
+    assert kinds == [('line', other._tag), ('polygon', 'turtles'),
+                     ('polygon', 'turtles')]
@@ -15,14 +15,23 @@ def register_callback():
 
 
 def canvas_callback():
+    if turtle.Turtle._screen is None:
+        return None
     return turtle.Screen()._canvas
 
 
-register(canvas_callback, register_callback)
+def reset_callback():
+    if turtle.Turtle._screen is not None:
+        turtle.Turtle._screen.bye()
+    turtle.TurtleScreen._RUNNING = True
+
+
+register(canvas_callback, register_callback, reset_callback)
 
 
 # Cleanup namespace
 del canvas_callback
 del register
 del register_callback
+del reset_callback
 del replaced_function
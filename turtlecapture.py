@@ -1,27 +1,177 @@
 import atexit
 import os
+import struct
+import zlib
 
 canvas_callback = None
 
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
 
-def exit_callback():
-    import sys
-    image_name = os.getenv('SAVEIMAGE')
-    script_dir = os.path.dirname(sys.argv[0])
-    ps_path = os.path.join(script_dir, '{0}.ps'.format(image_name))
-    png_path = os.path.join(script_dir, '{0}.png'.format(image_name))
 
-    # Create PS image
-    canvas = canvas_callback()
+def _png_chunk(tag, data):
+    crc = zlib.crc32(tag + data) & 0xffffffff
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', crc)
+
+
+def _filter_scanlines(rows, bpp):
+    """Return the scanlines of rows, a uint8 array of shape (height,
+    bytes per row), each prefixed and filtered with the PNG filter
+    type giving the least sum of absolute values."""
+    import numpy as np
+    raw = rows.astype(np.int16)
+    left = np.zeros_like(raw)
+    left[:, bpp:] = raw[:, :-bpp]
+    up = np.zeros_like(raw)
+    up[1:] = raw[:-1]
+    upleft = np.zeros_like(raw)
+    upleft[1:, bpp:] = raw[:-1, :-bpp]
+    estimate = left + up - upleft
+    pa = abs(estimate - left)
+    pb = abs(estimate - up)
+    pc = abs(estimate - upleft)
+    paeth = np.where((pa <= pb) & (pa <= pc), left,
+                     np.where(pb <= pc, up, upleft))
+    candidates = np.stack([raw, raw - left, raw - up,
+                           raw - (left + up) // 2, raw - paeth])
+    candidates = (candidates & 0xff).astype(np.uint8)
+    cost = abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+    best = cost.argmin(axis=0)
+    filtered = candidates[best, np.arange(len(raw))]
+    return np.hstack([best.astype(np.uint8)[:, None], filtered]).tobytes()
+
+
+def _palette_image(pixels, quantize):
+    """Return palette and index array of pixels, or None if there
+    are more than 256 colors and quantize is False."""
+    import numpy as np
+    rgb = pixels.astype(np.uint32)
+    packed = rgb[..., 0] << 16 | rgb[..., 1] << 8 | rgb[..., 2]
+    colors, index = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        if not quantize:
+            return None
+        # uniform 6x7x6 color cube
+        levels = np.array([6, 7, 6])
+        cube = (rgb * (levels - 1) + 127) // 255
+        cube = (cube * 255 + (levels - 1) // 2) // (levels - 1)
+        packed = cube[..., 0] << 16 | cube[..., 1] << 8 | cube[..., 2]
+        colors, index = np.unique(packed, return_inverse=True)
+    palette = np.stack([colors >> 16, colors >> 8 & 0xff, colors & 0xff],
+                       axis=1).astype(np.uint8)
+    return palette, index.reshape(packed.shape).astype(np.uint8)
+
+
+def _pack_indices(index, bits):
+    """Pack rows of palette indices into bits bits per pixel."""
+    import numpy as np
+    if bits == 8:
+        return index
+    per_byte = 8 // bits
+    height, width = index.shape
+    index = np.pad(index, ((0, 0), (0, -width % per_byte)))
+    index = index.reshape(height, -1, per_byte)
+    shifts = (8 - bits * np.arange(1, per_byte + 1)).astype(np.uint8)
+    return np.bitwise_or.reduce(index << shifts, axis=2).astype(np.uint8)
+
+
+def encode_png(pixels, palette=True, quantize=False, level=6):
+    """Return the PNG file contents for pixels, an array of shape
+    (height, width, 3) of 8 bit rgb values.
+
+    If palette is true and the image has at most 256 colors, which is
+    the rule for turtle drawings, a palette image is written. With
+    quantize true images with more colors are reduced to a 6x7x6 color
+    cube instead of being written as truecolor images.
+    """
+    import numpy as np
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    height, width = pixels.shape[:2]
+    indexed = _palette_image(pixels, quantize) if palette else None
+    if indexed is not None:
+        colors, index = indexed
+        bits = 8
+        for bits in (1, 2, 4, 8):
+            if len(colors) <= 1 << bits:
+                break
+        rows = _pack_indices(index, bits)
+        # filter type None is best for palette images
+        scanlines = np.hstack([np.zeros((height, 1), np.uint8), rows])
+        header = struct.pack('>IIBBBBB', width, height, bits, 3, 0, 0, 0)
+        chunks = [_png_chunk(b'IHDR', header),
+                  _png_chunk(b'PLTE', colors.tobytes())]
+        data = scanlines.tobytes()
+    else:
+        header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+        chunks = [_png_chunk(b'IHDR', header)]
+        data = _filter_scanlines(pixels.reshape(height, width * 3), 3)
+    chunks.append(_png_chunk(b'IDAT', zlib.compress(data, level)))
+    chunks.append(_png_chunk(b'IEND', b''))
+    return PNG_SIGNATURE + b''.join(chunks)
+
+
+def write_png(png_path, pixels, **kwargs):
+    """Write pixels as a PNG file, see encode_png for the arguments."""
+    data = encode_png(pixels, **kwargs)
+    with open(png_path, 'wb') as png_file:
+        png_file.write(data)
+
+
+def canvas_pixels(canvas):
+    """Return the canvas contents as an array of rgb values, or None
+    if the canvas cannot render itself (e.g. NumPy is missing).
+
+    Tk canvases cannot: their items may use features the raster
+    backend does not draw, such as ovals, arcs, dashes or fonts, so
+    postscript() is the faithful image of them."""
+    if not hasattr(canvas, 'image'):
+        return None
+    try:
+        return canvas.image()
+    except ImportError:
+        return None
+
+
+def save_image(png_path):
+    """Save the canvas of the registered turtle module as png_path.
+
+    Returns the path of the saved file, which is a PostScript file
+    when no PNG could be produced, or None if nothing was drawn.
+    """
+    canvas = current_canvas()
+    if canvas is None:
+        return None
     canvas.update()
+
+    # Encode PNG in process when the canvas provides its pixels
+    pixels = canvas_pixels(canvas)
+    if pixels is not None:
+        write_png(png_path, pixels)
+        return png_path
+
+    # Create PS image
+    ps_path = os.path.splitext(png_path)[0] + '.ps'
     canvas.postscript(file=ps_path, colormode='color')
 
     # Convert to PNG
     if os.system('convert {0} {1}'.format(ps_path, png_path)) == 0:
         os.unlink(ps_path)
+        return png_path
+    return ps_path
+
+
+def exit_callback():
+    import sys
+    image_name = os.getenv('SAVEIMAGE')
+    script_dir = os.path.dirname(sys.argv[0])
+    png_path = os.path.join(script_dir, '{0}.png'.format(image_name))
+
+    saved_path = save_image(png_path)
+    if saved_path is None:
+        print('Nothing was drawn, no image saved')
+    elif saved_path == png_path:
         print('Saved PNG image to {0}'.format(png_path))
     else:
-        print('Saved PS image to {0}'.format(ps_path))
+        print('Saved PS image to {0}'.format(saved_path))
 
 
 def replaced_function(function_name, display_once=False):
@@ -33,12 +183,726 @@ def replaced_function(function_name, display_once=False):
     return wrap
 
 
-def register(canvas_cb, register_cb=None):
+def current_canvas():
+    """Return the canvas of the most recently registered turtle module
+    which has one, or None."""
+    for canvas_cb, reset_cb in reversed(_callbacks):
+        canvas = canvas_cb()
+        if canvas is not None:
+            return canvas
+    return None
+
+
+def reset():
+    """Destroy the windows and turtles of all registered turtle modules."""
+    for canvas_cb, reset_cb in _callbacks:
+        if reset_cb:
+            reset_cb()
+
+
+def register(canvas_cb, register_cb=None, reset_cb=None):
     global canvas_callback
     # Only modify when the environment variable is set
     if os.getenv('SAVEIMAGE'):
+        if canvas_callback is None:
+            # Register exit callback
+            atexit.register(exit_callback)
         canvas_callback = canvas_cb
-        # Register exit callback
-        atexit.register(exit_callback)
+        _callbacks.append((canvas_cb, reset_cb))
         if register_cb:
             register_cb()
+
+
+# Batch capture
+
+class JobTimeout(BaseException):
+    """Raised in a job when its time is up. Not an Exception, so that
+    scripts catching Exception do not carry on regardless."""
+
+
+def _raise_timeout(signum, frame):
+    raise JobTimeout()
+
+
+def read_manifest(manifest_path):
+    """Return the (script path, image name) pairs listed in a manifest.
+
+    Each line of the manifest names a script, optionally followed by the
+    name of its image. Blank lines and lines starting with # are ignored.
+    Relative paths are relative to the directory of the manifest. The
+    image name defaults to the script path relative to that directory,
+    with path separators replaced by underscores and without .py.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    with open(manifest_path) as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split(None, 1)
+            script = os.path.join(base_dir, parts[0])
+            if len(parts) > 1:
+                image_name = parts[1]
+            else:
+                image_name = os.path.splitext(os.path.relpath(script, base_dir))[0]
+                image_name = image_name.replace(os.sep, '_')
+            jobs.append((script, image_name))
+    return jobs
+
+
+class XvfbDisplays(object):
+    """A pool of long-lived Xvfb servers for capture jobs using Tk.
+
+    Starting an X server for every script, as xvfb-run does, costs more
+    than most scripts take to run. The servers of the pool are started
+    once and handed out with acquire and returned with release. A server
+    which has died, or has served max_uses jobs, is replaced on release.
+    """
+
+    def __init__(self, count=1, screen='1280x1024x24', max_uses=200):
+        import threading
+        self.screen = screen
+        self.max_uses = max_uses
+        self._lock = threading.Condition()
+        self._servers = {}  # display -> [process, uses]
+        self._free = []
+        for _ in range(count):
+            self._add(*self._start())
+
+    def _start(self):
+        """Start an Xvfb server and return its display and process."""
+        import subprocess
+        read_fd, write_fd = os.pipe()
+        try:
+            process = subprocess.Popen(
+                ['Xvfb', '-displayfd', str(write_fd), '-screen', '0',
+                 self.screen, '-nolisten', 'tcp'],
+                pass_fds=(write_fd,), stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL)
+        except OSError as e:
+            os.close(read_fd)
+            os.close(write_fd)
+            raise RuntimeError('Cannot start Xvfb: {0}'.format(e))
+        os.close(write_fd)
+        # Xvfb writes its display number once it accepts connections
+        with os.fdopen(read_fd) as ready:
+            number = ready.readline().strip()
+        if not number:
+            process.kill()
+            process.wait()
+            raise RuntimeError('Xvfb exited before it was ready')
+        return ':' + number, process
+
+    def _add(self, display, process):
+        self._servers[display] = [process, 0]
+        self._free.append(display)
+
+    def acquire(self):
+        """Return the name of a free display, waiting for one if needed."""
+        with self._lock:
+            while not self._free:
+                self._lock.wait()
+            display = self._free.pop()
+            self._servers[display][1] += 1
+            return display
+
+    def release(self, display):
+        """Return display to the pool, restarting its server if needed."""
+        with self._lock:
+            process, uses = self._servers[display]
+            if process.poll() is None and uses < self.max_uses:
+                self._free.append(display)
+            else:
+                del self._servers[display]
+                process.kill()
+                process.wait()
+                self._add(*self._start())
+            self._lock.notify()
+
+    def close(self):
+        """Stop all servers of the pool."""
+        with self._lock:
+            for process, uses in self._servers.values():
+                process.terminate()
+            for process, uses in self._servers.values():
+                process.wait()
+            self._servers.clear()
+            del self._free[:]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _local_files(script):
+    """Return the paths of the files script depends on: itself, the
+    modules it imports from its own directory, recursively, and the
+    files of that directory named by string literals, such as images."""
+    import ast
+    base_dir = os.path.dirname(script)
+    found = []
+    pending = [script]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.append(path)
+        if not path.endswith('.py'):
+            continue
+        try:
+            with open(path, 'rb') as source:
+                tree = ast.parse(source.read(), path)
+        except (SyntaxError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            names = []
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module \
+                    and not node.level:
+                names = [node.module]
+            elif isinstance(node, ast.Constant) and \
+                    isinstance(node.value, str) and len(node.value) < 256:
+                candidate = os.path.join(base_dir, node.value)
+                if os.path.isfile(candidate):
+                    pending.append(os.path.abspath(candidate))
+            for name in names:
+                module_path = os.path.join(base_dir, *name.split('.'))
+                for candidate in (module_path + '.py',
+                                  os.path.join(module_path, '__init__.py')):
+                    if os.path.isfile(candidate):
+                        pending.append(candidate)
+    return sorted(found)
+
+
+class CaptureCache(object):
+    """A cache of captured images, addressed by the hash of everything a
+    capture depends on.
+
+    The key of a script covers its source, the local modules and files it
+    uses, its argv and standard input, the backend and the source of the
+    capturing modules themselves. Each entry is an image and a JSON file
+    of the job's result in directory; the least recently used entries are
+    removed once they take more than max_size bytes.
+    """
+
+    def __init__(self, directory, max_size=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self._environment = None
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _environment_hash(self):
+        """Hash the capturing modules, so a change to them misses."""
+        import glob
+        import hashlib
+        if self._environment is None:
+            package_dir = os.path.dirname(os.path.abspath(__file__))
+            digest = hashlib.sha256()
+            for path in sorted(glob.glob(os.path.join(package_dir, 'cTurtle',
+                                                      '*.py')) +
+                               [os.path.join(package_dir, 'turtle.py'),
+                                os.path.abspath(__file__)]):
+                if os.path.isfile(path):
+                    with open(path, 'rb') as source:
+                        digest.update(source.read())
+            self._environment = digest.hexdigest()
+        return self._environment
+
+    def key(self, script, argv=None, stdin=b'', backend=None):
+        """Return the cache key of running script."""
+        import hashlib
+        import json
+        script = os.path.abspath(script)
+        base_dir = os.path.dirname(script)
+        backend = backend or os.getenv('TURTLEBACKEND')
+        digest = hashlib.sha256()
+        digest.update(json.dumps([argv or [script], backend,
+                                  self._environment_hash()]).encode())
+        digest.update(hashlib.sha256(stdin).digest())
+        for path in _local_files(script):
+            digest.update(os.path.relpath(path, base_dir).encode() + b'\0')
+            with open(path, 'rb') as source:
+                digest.update(hashlib.sha256(source.read()).digest())
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.png'
+
+    def get(self, key, png_path):
+        """Copy the cached image of key to png_path and return the cached
+        result of the job, or return None if key is not cached."""
+        import json
+        import shutil
+        json_path, cached_png = self._paths(key)
+        try:
+            with open(json_path) as metadata:
+                result = json.load(metadata)
+            if result['image'] is not None:
+                shutil.copyfile(cached_png, png_path)
+                result['image'] = png_path
+                os.utime(cached_png)
+            os.utime(json_path)
+        except (IOError, OSError, ValueError):
+            return None
+        result['cached'] = True
+        return result
+
+    def put(self, key, result):
+        """Store the result of a job under key. Jobs which timed out or
+        were lost are not stored, nor are PostScript fallbacks."""
+        import json
+        import shutil
+        image = result['image']
+        if result['status'] == 'timeout' or result['seconds'] is None or \
+                (image is not None and not image.endswith('.png')):
+            return
+        json_path, cached_png = self._paths(key)
+        if image is not None:
+            shutil.copyfile(image, cached_png + '.tmp')
+            os.replace(cached_png + '.tmp', cached_png)
+        with open(json_path + '.tmp', 'w') as metadata:
+            json.dump(result, metadata)
+        os.replace(json_path + '.tmp', json_path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            json_path, cached_png = self._paths(name[:-5])
+            try:
+                size = os.path.getsize(json_path)
+                if os.path.exists(cached_png):
+                    size += os.path.getsize(cached_png)
+                entries.append((os.path.getmtime(json_path), size, json_path,
+                                cached_png))
+            except OSError:  # removed by another process
+                continue
+            total += size
+        entries.sort()
+        while total > self.max_size and entries:
+            mtime, size, json_path, cached_png = entries.pop(0)
+            for path in (json_path, cached_png):
+                if os.path.exists(path):
+                    os.unlink(path)
+            total -= size
+
+
+def run_cached(jobs, cache, run, backend=None):
+    """Yield the cached results of (script, png path) jobs, then those of
+    running the others with run, which are stored in cache."""
+    keys = {}
+    missed = []
+    for script, png_path in jobs:
+        script = os.path.abspath(script)
+        key = cache.key(script, backend=backend)
+        result = cache.get(key, png_path)
+        if result is None:
+            keys[script] = key
+            missed.append((script, png_path))
+        else:
+            yield result
+    if missed:
+        for result in run(missed):
+            cache.put(keys[os.path.abspath(result['script'])], result)
+            yield result
+
+
+def prepare_worker(backend=None):
+    """Import the turtle modules once, so jobs start with warm modules.
+    The capture hooks are installed, but no image is saved at exit."""
+    import sys
+    os.environ.setdefault('SAVEIMAGE', 'batch')
+    if backend:
+        os.environ['TURTLEBACKEND'] = backend
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    if package_dir not in sys.path:
+        sys.path.insert(0, package_dir)
+    import tkinter
+    import cTurtle
+    try:
+        import turtle
+    except Exception:  # the standard turtle module is optional
+        pass
+    atexit.unregister(exit_callback)
+
+
+def run_job(script, png_path, timeout=None):
+    """Run script with fresh globals as __main__ and save its final
+    canvas as png_path.
+
+    Returns a dict with the keys script, image (the saved file or None),
+    status ('ok', 'timeout' or 'error'), error, output and seconds.
+    """
+    import contextlib
+    import io
+    import runpy
+    import signal
+    import sys
+    import time
+    import traceback
+    script = os.path.abspath(script)
+    script_dir = os.path.dirname(script)
+    saved_argv, saved_path, saved_cwd = sys.argv[:], sys.path[:], os.getcwd()
+    saved_stdin = sys.stdin
+    modules_before = set(sys.modules)
+    result = {'script': script, 'image': None, 'status': 'ok',
+              'error': None, 'output': ''}
+    output = io.StringIO()
+    start = time.time()
+    sys.argv = [script]
+    sys.path.insert(0, script_dir)
+    sys.stdin = io.StringIO()
+    previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    try:
+        os.chdir(script_dir)
+        with contextlib.redirect_stdout(output), \
+                contextlib.redirect_stderr(output):
+            try:
+                if timeout:
+                    signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    runpy.run_path(script, run_name='__main__')
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            except SystemExit:
+                pass
+            except JobTimeout:
+                result['status'] = 'timeout'
+                result['error'] = 'timed out after {0}s'.format(timeout)
+            except BaseException:
+                result['status'] = 'error'
+                result['error'] = traceback.format_exc()
+            try:
+                result['image'] = save_image(png_path)
+            except Exception:
+                if result['status'] == 'ok':
+                    result['status'] = 'error'
+                    result['error'] = traceback.format_exc()
+    finally:
+        signal.signal(signal.SIGALRM, previous_handler)
+        reset()
+        os.chdir(saved_cwd)
+        sys.argv[:], sys.path[:], sys.stdin = saved_argv, saved_path, saved_stdin
+        # Forget the script's own modules, so the next job imports its own
+        for name in set(sys.modules) - modules_before:
+            module_file = getattr(sys.modules[name], '__file__', None) or ''
+            if os.path.abspath(module_file).startswith(script_dir + os.sep):
+                del sys.modules[name]
+    result['output'] = output.getvalue()
+    result['seconds'] = time.time() - start
+    return result
+
+
+def run_job_on(script, png_path, timeout=None, display=None):
+    """Run script as run_job does, drawing on the X display display,
+    if given. The Tk root of a job is made and destroyed by the job,
+    so each job of a worker may use another display."""
+    if display:
+        os.environ['DISPLAY'] = display
+    return run_job(script, png_path, timeout)
+
+
+def _lost_job(script, error):
+    return {'script': script, 'image': None, 'status': 'error',
+            'error': error, 'output': '', 'seconds': None}
+
+
+def fork_job(script, png_path, timeout=None, display=None):
+    """Run script as run_job does, in a child forked from this process.
+
+    The process should be prepared with prepare_worker and must not have
+    created a Tk root, so each child starts from the already imported
+    modules. The child draws on the X display display, if given. Returns
+    the pid of the child and the file descriptor of a pipe from which
+    its pickled result is read.
+    """
+    import pickle
+    import sys
+    read_fd, write_fd = os.pipe()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            if display:
+                os.environ['DISPLAY'] = display
+            result = run_job(script, png_path, timeout)
+            with os.fdopen(write_fd, 'wb') as pipe:
+                pickle.dump(result, pipe)
+            status = 0
+        finally:
+            # Skip atexit handlers and buffers inherited from the parent
+            os._exit(status)
+    os.close(write_fd)
+    return pid, read_fd
+
+
+def run_forked(jobs, timeout=30, workers=None, displays=None):
+    """Run (script, png path) jobs in children forked from this process,
+    at most workers at a time, and yield their results as they complete.
+    A child which outlives its own timer by 30 seconds is killed. Each
+    child is lent a display of displays, an XvfbDisplays, if given."""
+    import pickle
+    import select
+    import signal
+    import time
+    jobs = iter(jobs)
+    workers = workers or os.cpu_count() or 1
+    running = {}  # read fd -> (pid, script, chunks, deadline, display)
+    try:
+        while True:
+            while len(running) < workers:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                display = displays.acquire() if displays else None
+                pid, read_fd = fork_job(job[0], job[1], timeout, display)
+                deadline = time.time() + timeout + 30 if timeout else None
+                running[read_fd] = (pid, job[0], [], deadline, display)
+            if not running:
+                return
+            deadlines = [job[3] for job in running.values() if job[3]]
+            wait = max(0, min(deadlines) - time.time()) if deadlines else None
+            ready = select.select(list(running), [], [], wait)[0]
+            for read_fd in list(running):
+                pid, script, chunks, deadline, display = running[read_fd]
+                if read_fd in ready:
+                    data = os.read(read_fd, 65536)
+                    if data:
+                        chunks.append(data)
+                        continue
+                elif deadline is None or time.time() < deadline:
+                    continue
+                else:
+                    os.kill(pid, signal.SIGKILL)
+                del running[read_fd]
+                os.close(read_fd)
+                os.waitpid(pid, 0)
+                if display:
+                    displays.release(display)
+                try:
+                    yield pickle.loads(b''.join(chunks))
+                except Exception:
+                    yield _lost_job(script, 'child process died')
+    finally:
+        for read_fd, (pid, script, chunks, deadline, display) in \
+                running.items():
+            os.kill(pid, signal.SIGKILL)
+            os.close(read_fd)
+            os.waitpid(pid, 0)
+            if display:
+                displays.release(display)
+
+
+def run_batch(jobs, output_dir, workers=None, timeout=30, backend=None,
+              fork=False, xvfb=False, cache=None):
+    """Run (script, image name) jobs and yield their results as they
+    complete. The jobs run on a pool of prepared worker processes, or
+    with fork true each in a child forked from this process. With xvfb
+    true they draw on a pool of Xvfb servers, one per worker. Jobs found
+    in cache, a CaptureCache, are not run at all."""
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    jobs = [(script, os.path.join(os.path.abspath(output_dir),
+                                  '{0}.png'.format(image_name)))
+            for script, image_name in jobs]
+    if cache is None:
+        return _run_batch(jobs, workers, timeout, backend, fork, xvfb)
+    return run_cached(jobs, cache, lambda missed: _run_batch(
+        missed, workers, timeout, backend, fork, xvfb), backend)
+
+
+def _run_batch(jobs, workers, timeout, backend, fork, xvfb):
+    workers = workers or os.cpu_count() or 1
+    displays = XvfbDisplays(workers) if xvfb else None
+    try:
+        if fork:
+            prepare_worker(backend)
+            for result in run_forked(jobs, timeout, workers, displays):
+                yield result
+        else:
+            for result in _run_pool(jobs, workers, timeout, backend,
+                                    displays):
+                yield result
+    finally:
+        if displays:
+            displays.close()
+
+
+def _run_pool(jobs, workers, timeout, backend, displays):
+    """Run jobs on a pool of workers, at most one job per worker at a
+    time, and yield their results as they complete. Each job is lent a
+    display of displays, an XvfbDisplays, if given, which is released,
+    and restarted if it died or served many jobs, when the job ends.
+    A job whose worker outlives its timer by 30 seconds is lost: the
+    pool is replaced, and the other running jobs start over."""
+    import multiprocessing
+    import time
+    jobs = iter(jobs)
+    running = []  # (job, async result, deadline, display)
+    pool = multiprocessing.Pool(workers, prepare_worker, (backend,))
+    try:
+        while True:
+            while len(running) < workers:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                display = displays.acquire() if displays else None
+                running.append(_submit(pool, job, timeout, display))
+            if not running:
+                return
+            finished = [entry for entry in running if entry[1].ready()]
+            lost = [entry for entry in running if entry not in finished and
+                    entry[2] is not None and time.time() >= entry[2]]
+            if not finished and not lost:
+                running[0][1].wait(0.05)
+                continue
+            running = [entry for entry in running
+                       if entry not in finished and entry not in lost]
+            if lost:
+                # the hung workers may still draw on their displays
+                pool.terminate()
+                pool.join()
+                pool = multiprocessing.Pool(workers, prepare_worker,
+                                            (backend,))
+                running = [_submit(pool, job, timeout, display)
+                           for job, _, _, display in running]
+            for job, async_result, deadline, display in finished + lost:
+                if display:
+                    displays.release(display)
+                if async_result.ready():
+                    yield async_result.get()
+                else:
+                    yield _lost_job(job[0], 'worker lost')
+    finally:
+        pool.terminate()
+        pool.join()
+        for job, async_result, deadline, display in running:
+            if display:
+                displays.release(display)
+
+
+def _submit(pool, job, timeout, display):
+    """Start the (script, png path) job on pool, drawing on display.
+    Return the job, its async result, deadline and display."""
+    import time
+    async_result = pool.apply_async(run_job_on,
+                                    (job[0], job[1], timeout, display))
+    # the job's own timer fires first, unless the worker died
+    deadline = time.time() + timeout + 30 if timeout else None
+    return job, async_result, deadline, display
+
+
+def serve(timeout=30, backend=None, xvfb=False, cache=None):
+    """Capture scripts as they are requested on standard input.
+
+    Each line names a script and the path of its image. The modules are
+    imported once, then a child is forked for each script, and its
+    result is written to standard output as a line of JSON. With xvfb
+    true the children draw on a persistent Xvfb server. Scripts found in
+    cache, a CaptureCache, are answered without running them.
+    """
+    prepare_worker(backend)
+    displays = XvfbDisplays(1) if xvfb else None
+    try:
+        _serve(timeout, displays, cache, backend)
+    finally:
+        if displays:
+            displays.close()
+
+
+def _serve(timeout, displays, cache, backend):
+    import json
+    import sys
+    for line in sys.stdin:
+        parts = line.split(None, 1)
+        if not parts:
+            continue
+        script = os.path.abspath(parts[0])
+        if len(parts) > 1:
+            png_path = os.path.abspath(parts[1].strip())
+        else:
+            png_path = os.path.splitext(script)[0] + '.png'
+        jobs = [(script, png_path)]
+        if cache is None:
+            results = run_forked(jobs, timeout, 1, displays)
+        else:
+            results = run_cached(jobs, cache, lambda missed: run_forked(
+                missed, timeout, 1, displays), backend)
+        for result in results:
+            sys.stdout.write(json.dumps(result) + '\n')
+            sys.stdout.flush()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m turtlecapture')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    batch = commands.add_parser(
+        'batch', help='capture the images of the scripts listed in a manifest')
+    batch.add_argument('manifest')
+    batch.add_argument('-o', '--output-dir', default='.')
+    batch.add_argument('-j', '--workers', type=int, default=None)
+    batch.add_argument('-f', '--fork', action='store_true',
+                       help='fork a fresh child for each script')
+    server = commands.add_parser(
+        'serve', help='capture scripts requested on standard input')
+    for command in (batch, server):
+        command.add_argument('-t', '--timeout', type=float, default=30,
+                             help='seconds per script (default 30)')
+        command.add_argument('-b', '--backend', default=None,
+                             help='cTurtle backend, e.g. recording or raster')
+        command.add_argument('-x', '--xvfb', action='store_true',
+                             help='draw on persistent Xvfb servers')
+        command.add_argument('-c', '--cache', default=None, metavar='DIR',
+                             help='reuse the images of unchanged scripts')
+        command.add_argument('--cache-size', type=float, default=256,
+                             help='megabytes kept in the cache (default 256)')
+    batch.add_argument('-v', '--verbose', action='store_true',
+                       help='show the output of failing scripts')
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache:
+        cache = CaptureCache(args.cache, int(args.cache_size * 1024 * 1024))
+    if args.command == 'serve':
+        serve(args.timeout, args.backend, args.xvfb, cache)
+        return 0
+
+    failures = 0
+    jobs = read_manifest(args.manifest)
+    for result in run_batch(jobs, args.output_dir, args.workers,
+                            args.timeout, args.backend, args.fork,
+                            args.xvfb, cache):
+        if result['status'] != 'ok':
+            failures += 1
+        status = result['status'] + (' cached' if result.get('cached')
+                                     else '')
+        print('{0:15} {1} -> {2}'.format(status, result['script'],
+                                          result['image']))
+        if result['status'] != 'ok' and args.verbose:
+            print(result['output'] + (result['error'] or ''))
+    print('{0} scripts, {1} failed'.format(len(jobs), failures))
+    return 1 if failures else 0
+
+
+_callbacks = []
+
+
+if __name__ == '__main__':
+    # Run from the importable module, which the turtle modules register with
+    import sys
+    import turtlecapture
+    sys.exit(turtlecapture.main())